@@ -142,6 +142,8 @@ CREATE INDEX ix_internship_org       ON internship(org_id);
 CREATE INDEX ix_internship_location  ON internship(location);
 CREATE INDEX ix_internship_pincode   ON internship(pincode);
 CREATE INDEX ix_internship_active    ON internship(is_active);
+-- keyword search for GET /internships?q= (secondary indexes above already carry internship_id for keyset paging)
+CREATE FULLTEXT INDEX ft_internship_search ON internship(title, req_skills_text);
 
 -- 4a) Internship skills
 CREATE TABLE job_skill_required (
@@ -190,7 +192,10 @@ CREATE TABLE match_result (
   internship_id   BIGINT NOT NULL,
   allocated_slot  INT NOT NULL DEFAULT 1,
   final_score     DECIMAL(6,4) NOT NULL,
-  component_json  JSON NULL,
+  -- score components; run-level weights are stored once in alloc_run.params_json
+  sem_score       DECIMAL(6,4) NULL,
+  loc_score       DECIMAL(6,4) NULL,
+  cgpa_score      DECIMAL(6,4) NULL,
   explanation     TEXT NULL,
   created_at      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
@@ -205,6 +210,61 @@ CREATE INDEX ix_match_run         ON match_result(run_id);
 CREATE INDEX ix_match_internship  ON match_result(internship_id);
 CREATE INDEX ix_match_student     ON match_result(student_id);
 
+-- 7a) MATCH HISTORY ARCHIVE (compaction target; see app/compaction.py)
+-- Range-partitioned by run_id so old history can be dropped a partition at a time.
+-- Partitioned InnoDB tables cannot carry foreign keys, and the PK must include run_id.
+CREATE TABLE match_result_archive (
+  match_id        BIGINT NOT NULL,
+  run_id          BIGINT NOT NULL,
+  student_id      BIGINT NOT NULL,
+  internship_id   BIGINT NOT NULL,
+  allocated_slot  INT NOT NULL DEFAULT 1,
+  final_score     DECIMAL(6,4) NOT NULL,
+  sem_score       DECIMAL(6,4) NULL,
+  loc_score       DECIMAL(6,4) NULL,
+  cgpa_score      DECIMAL(6,4) NULL,
+  explanation     TEXT NULL,
+  created_at      TIMESTAMP NOT NULL,
+  archived_at     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (run_id, match_id)
+) ENGINE=InnoDB ROW_FORMAT=COMPRESSED
+PARTITION BY RANGE (run_id) (
+  PARTITION p_max VALUES LESS THAN MAXVALUE
+);
+
+CREATE INDEX ix_match_archive_student ON match_result_archive(student_id);
+
+-- 7b) WAITLISTS: top-N unassigned eligible candidates per internship from the last full or delta run
+--     that scored it (for backfill); each such run replaces the internship's previous list
+CREATE TABLE internship_waitlist (
+  run_id          BIGINT NOT NULL,
+  internship_id   BIGINT NOT NULL,
+  ranked          INT NOT NULL,
+  student_id      BIGINT NOT NULL,
+  score           DECIMAL(6,4) NOT NULL,
+  sem_score       DECIMAL(6,4) NULL,
+  loc_score       DECIMAL(6,4) NULL,
+  cgpa_score      DECIMAL(6,4) NULL,
+  PRIMARY KEY (internship_id, run_id, ranked),
+  CONSTRAINT fk_wl_run        FOREIGN KEY (run_id)        REFERENCES alloc_run(run_id)        ON DELETE CASCADE,
+  CONSTRAINT fk_wl_internship FOREIGN KEY (internship_id) REFERENCES internship(internship_id) ON DELETE CASCADE,
+  CONSTRAINT fk_wl_student    FOREIGN KEY (student_id)    REFERENCES student(student_id)       ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE INDEX ix_wl_run     ON internship_waitlist(run_id);
+CREATE INDEX ix_wl_student ON internship_waitlist(student_id);
+
+-- 7c) WITHDRAWALS: students who gave up a placement. Their match rows stay as history but no longer
+--     count as used seats, and no run or backfill places them again. Permanent: cleared only with the
+--     student row or by a replace_all student upload.
+CREATE TABLE student_withdrawal (
+  student_id    BIGINT PRIMARY KEY,
+  internship_id BIGINT NULL,
+  withdrawn_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT fk_sw_student    FOREIGN KEY (student_id)    REFERENCES student(student_id)       ON DELETE CASCADE,
+  CONSTRAINT fk_sw_internship FOREIGN KEY (internship_id) REFERENCES internship(internship_id) ON DELETE SET NULL
+) ENGINE=InnoDB;
+
 -- 8) AUDIT LOGS
 CREATE TABLE audit_log (
   audit_id     BIGINT PRIMARY KEY AUTO_INCREMENT,
@@ -220,24 +280,50 @@ CREATE INDEX ix_audit_run   ON audit_log(run_id);
 CREATE INDEX ix_audit_level ON audit_log(level);
 
 -- 9) VIEWS
+-- compaction snapshots only re-file older placements, they are never "the latest run"
 CREATE OR REPLACE VIEW v_latest_run AS
 SELECT run_id
 FROM alloc_run
 WHERE status = 'SUCCESS'
+  AND COALESCE(params_json->>'$.mode', '') <> 'compaction'
 ORDER BY created_at DESC
 LIMIT 1;
 
+-- Compatibility view: match_result with the old per-row component_json shape rebuilt
+CREATE OR REPLACE VIEW v_match_result AS
+SELECT
+  mr.match_id, mr.run_id, mr.student_id, mr.internship_id, mr.allocated_slot, mr.final_score,
+  JSON_OBJECT('semantic', mr.sem_score, 'location', mr.loc_score, 'cgpa_norm', mr.cgpa_score,
+              'weights', ar.params_json->'$.weights') AS component_json,
+  mr.explanation, mr.created_at
+FROM match_result mr
+JOIN alloc_run ar ON ar.run_id = mr.run_id;
+
 CREATE OR REPLACE VIEW v_latest_matches AS
 SELECT
   mr.run_id, mr.student_id, s.name AS student_name, s.email,
   mr.internship_id, i.title AS internship_title, COALESCE(i.org_name, o.org_name) AS org_name,
   i.location, i.pincode, mr.final_score, mr.component_json, mr.created_at
-FROM match_result mr
+FROM v_match_result mr
 JOIN student s       ON s.student_id = mr.student_id
 JOIN internship i    ON i.internship_id = mr.internship_id
 LEFT JOIN organization o ON o.org_id = i.org_id
 WHERE mr.run_id = (SELECT run_id FROM v_latest_run);
 
+CREATE OR REPLACE VIEW v_match_history AS
+SELECT h.run_id, h.student_id, h.internship_id, h.allocated_slot, h.final_score,
+       JSON_OBJECT('semantic', h.sem_score, 'location', h.loc_score, 'cgpa_norm', h.cgpa_score,
+                   'weights', ar.params_json->'$.weights') AS component_json,
+       h.created_at
+FROM (
+  SELECT run_id, student_id, internship_id, allocated_slot, final_score, sem_score, loc_score, cgpa_score, created_at
+  FROM match_result
+  UNION ALL
+  SELECT run_id, student_id, internship_id, allocated_slot, final_score, sem_score, loc_score, cgpa_score, created_at
+  FROM match_result_archive
+) h
+JOIN alloc_run ar ON ar.run_id = h.run_id;
+
 -- =========================================================
 -- SEED DATA
 -- =========================================================
@@ -434,4 +520,23 @@ VALUES ('SUCCESS',
         JSON_OBJECT('weights', JSON_OBJECT('exact',0.45,'rpl',0.20,'sem',0.15,'dist',0.10,'lang',0.05,'avail',0.05,'cgpa',0.10)),
         NULL);
 
+-- Upgrading a database created before typed score columns (run once):
+--   ALTER TABLE match_result
+--     ADD COLUMN sem_score DECIMAL(6,4) NULL AFTER final_score,
+--     ADD COLUMN loc_score DECIMAL(6,4) NULL AFTER sem_score,
+--     ADD COLUMN cgpa_score DECIMAL(6,4) NULL AFTER loc_score;
+--   UPDATE match_result SET sem_score  = component_json->>'$.semantic',
+--                           loc_score  = component_json->>'$.location',
+--                           cgpa_score = component_json->>'$.cgpa_norm';
+--   UPDATE alloc_run ar SET params_json = JSON_SET(COALESCE(params_json, JSON_OBJECT()), '$.weights',
+--     (SELECT mr.component_json->'$.weights' FROM match_result mr WHERE mr.run_id = ar.run_id LIMIT 1))
+--   WHERE EXISTS (SELECT 1 FROM match_result mr WHERE mr.run_id = ar.run_id);
+--   ALTER TABLE match_result DROP COLUMN component_json;
+
+-- Pruning waitlists written before lists were replaced per internship (run once):
+--   DELETE w FROM internship_waitlist w
+--   JOIN (SELECT internship_id, MAX(run_id) AS keep_run FROM internship_waitlist GROUP BY internship_id) k
+--     ON k.internship_id = w.internship_id
+--   WHERE w.run_id < k.keep_run;
+
 -- Done.
\ No newline at end of file
@@ -1,11 +1,15 @@
 # app/allocation.py
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
 from sqlalchemy import text, bindparam
-import math, json
-from typing import List, Optional
+import asyncio, math, json, random, time, zlib
+from functools import partial
+from typing import Dict, List, Optional, Set
 from collections import defaultdict
 
+from app.locks import GLOBAL_LOCK, lock_name, locked_connection, region_key
+from app.progress import Progress
+
 
 # ---------- Utility Functions ----------
 def norm(x, lo, hi):
@@ -16,29 +20,482 @@ def norm(x, lo, hi):
     return max(0.0, min(1.0, (x - lo) / (hi - lo)))
 
 
+def tokens(text_: str) -> Set[str]:
+    """Whitespace/comma tokens, lowercased (the token sets jaccard() compares)"""
+    if not text_:
+        return set()
+    return set(w.strip().lower() for w in text_.replace(",", " ").split())
+
+
 def jaccard(text_a: str, text_b: str) -> float:
     """Simple Jaccard similarity on whitespace/comma tokens"""
     if not text_a or not text_b:
         return 0.0
-    A = set(w.strip().lower() for w in text_a.replace(",", " ").split())
-    B = set(w.strip().lower() for w in text_b.replace(",", " ").split())
+    A = tokens(text_a)
+    B = tokens(text_b)
     if not A or not B:
         return 0.0
     return len(A & B) / len(A | B)
 
 
+W_SEM, W_LOC, W_CG = 0.65, 0.20, 0.15
+WEIGHTS = {"sem": W_SEM, "loc": W_LOC, "cg": W_CG}  # stored once per run in params_json
+
+
+def score_pair(s, j, s_toks: Optional[Set[str]] = None, j_toks: Optional[Set[str]] = None):
+    """
+    Score one student row against one job_info entry.
+    s_toks / j_toks: precomputed tokens() of the skills texts, if the caller keeps them around.
+    Returns (score, (semantic, location, cgpa_norm)) or None if ineligible / zero score.
+    """
+    cg_ok = (s["cgpa"] is None) or (float(s["cgpa"]) >= j["min_cgpa"])
+    if not cg_ok:
+        return None
+
+    if s_toks is not None and j_toks is not None:
+        sem = len(s_toks & j_toks) / len(s_toks | j_toks) if (s_toks and j_toks) else 0.0
+    else:
+        sem = jaccard(s["skills_text"] or "", j["req_skills_text"])
+    cg = norm(float(s["cgpa"]) if s["cgpa"] is not None else 0.0, 6.0, 9.5) if j["min_cgpa"] > 0 else 0.0
+    loc = 1.0 if (s["location_pref"] and j["location"] and s["location_pref"].lower() == j["location"].lower()) else 0.0
+
+    score = W_SEM * sem + W_LOC * loc + W_CG * cg
+    if score <= 0:
+        return None
+
+    return score, (round(sem, 4), loc, round(cg, 4))
+
+
+def greedy_assign(pairs, remaining):
+    """pairs sorted by score desc; remaining is mutated. Returns {sid: (jid, score, comp)}"""
+    assigned = {}
+    for score, sid, jid, comp in pairs:
+        if sid in assigned:
+            continue
+        if remaining.get(jid, 0) <= 0:
+            continue
+        assigned[sid] = (jid, score, comp)
+        remaining[jid] -= 1
+    return assigned
+
+
+def improve_assignment(pairs, assigned, remaining, budget_ms: int) -> dict:
+    """
+    Anytime local search over a greedy assignment; mutates `assigned` and `remaining`.
+    Per student (first improvement, best candidates first):
+      - relocate into a better internship with a free seat
+      - swap with an occupant of a better, full internship
+      - ejection chain: take a seat in a full internship, its occupant moves to a free seat elsewhere
+    Every move raises the total score and never unplaces anyone; a move that frees a seat can let a
+    student greedy left out take it, so the set of placed students only grows.
+    Stops when a full pass finds nothing or the millisecond budget runs out.
+    """
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000.0
+    eps = 1e-9
+
+    # per-student candidate lists (pairs are sorted desc) + O(1) pair lookup
+    cand = defaultdict(list)
+    sc = defaultdict(dict)
+    for score, sid, jid, comp in pairs:
+        cand[sid].append(jid)
+        sc[sid][jid] = (score, comp)
+
+    # per-internship occupant lists
+    occ = defaultdict(list)
+    for sid, (jid, _, _) in assigned.items():
+        occ[jid].append(sid)
+
+    def place(sid, jid):
+        old = assigned.get(sid)
+        if old is not None:
+            occ[old[0]].remove(sid)
+            remaining[old[0]] += 1
+        score, comp = sc[sid][jid]
+        assigned[sid] = (jid, score, comp)
+        occ[jid].append(sid)
+        remaining[jid] -= 1
+
+    def swap(a, b):
+        ja, jb = assigned[a][0], assigned[b][0]
+        occ[ja].remove(a)
+        occ[jb].remove(b)
+        occ[ja].append(b)
+        occ[jb].append(a)
+        assigned[a] = (jb, *sc[a][jb])
+        assigned[b] = (ja, *sc[b][ja])
+
+    def try_improve(sid):
+        cur = assigned.get(sid)
+        cur_j, cur_s = (cur[0], cur[1]) if cur else (None, 0.0)
+        for j in cand[sid]:
+            s_new = sc[sid][j][0]
+            if s_new <= cur_s + eps:
+                break  # sorted desc: nothing better for this student
+            if j == cur_j:
+                continue
+            if remaining.get(j, 0) > 0:
+                place(sid, j)
+                return s_new - cur_s
+            for t in occ[j]:
+                t_here = sc[t][j][0]
+                if cur_j is not None and cur_j in sc[t]:
+                    g = s_new - cur_s + sc[t][cur_j][0] - t_here
+                    if g > eps:
+                        swap(sid, t)
+                        return g
+                for k in cand[t]:
+                    if k == j or remaining.get(k, 0) <= 0:
+                        continue
+                    g = s_new - cur_s + sc[t][k][0] - t_here
+                    if g > eps:
+                        place(t, k)
+                        place(sid, j)
+                        return g
+                    break  # best free seat for t does not pay off
+        return 0.0
+
+    gain, iters, moves = 0.0, 0, 0
+    students = list(cand)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for sid in students:
+            if time.perf_counter() >= deadline:
+                break
+            iters += 1
+            g = try_improve(sid)
+            if g > 0:
+                gain += g
+                moves += 1
+                improved = True
+
+    return {
+        "ls_gain": round(gain, 4),
+        "ls_iterations": iters,
+        "ls_moves": moves,
+        "ls_ms": round((time.perf_counter() - started) * 1000.0, 2),
+    }
+
+
+async def insert_matches(db: AsyncSession, run_id: int, assigned):
+    if not assigned:
+        return
+    rows = []
+    for sid, (jid, score, comp) in assigned.items():
+        rows.append({
+            "run_id": run_id,
+            "student_id": sid,
+            "internship_id": jid,
+            "final_score": float(round(score, 4)),
+            "sem_score": comp[0],
+            "loc_score": comp[1],
+            "cgpa_score": comp[2],
+        })
+    await db.execute(text("""
+        INSERT INTO match_result
+          (run_id, student_id, internship_id, final_score, sem_score, loc_score, cgpa_score)
+        VALUES
+          (:run_id, :student_id, :internship_id, :final_score, :sem_score, :loc_score, :cgpa_score)
+    """), rows)
+
+
+# ---------- MinHash / LSH ----------
+_MH_PRIME = (1 << 61) - 1
+
+
+def minhash_params(num_perm: int, seed: int = 1):
+    """(a, b) pairs for the universal hashes h(x) = (a*x + b) mod p"""
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _MH_PRIME), rng.randrange(0, _MH_PRIME)) for _ in range(num_perm)]
+
+
+def minhash(toks: Set[str], params) -> tuple:
+    hs = [zlib.crc32(t.encode("utf-8")) for t in toks]
+    return tuple(min((a * h + b) % _MH_PRIME for h in hs) for a, b in params)
+
+
+def lsh_threshold(bands: int, rows: int) -> float:
+    """Jaccard level at which a pair becomes a candidate with ~50% probability"""
+    return (1.0 / bands) ** (1.0 / rows)
+
+
+def lsh_candidates(students, job_info: Dict[int, dict], bands: int, rows: int) -> Dict[int, Set[int]]:
+    """
+    Band each MinHash signature into `bands` chunks of `rows` values; a student and a job
+    become candidates if any chunk collides. More bands / fewer rows -> higher recall, more pairs.
+    Returns {student_id: {internship_id, ...}}
+    """
+    params = minhash_params(bands * rows)
+
+    buckets = defaultdict(list)
+    for jid, j in job_info.items():
+        toks = tokens(j["req_skills_text"])
+        if not toks:
+            continue
+        sig = minhash(toks, params)
+        for b in range(bands):
+            buckets[(b, sig[b * rows:(b + 1) * rows])].append(jid)
+
+    cand = {}
+    for s in students:
+        toks = tokens(s["skills_text"] or "")
+        if not toks:
+            continue
+        sig = minhash(toks, params)
+        found = set()
+        for b in range(bands):
+            found.update(buckets.get((b, sig[b * rows:(b + 1) * rows]), ()))
+        if found:
+            cand[int(s["student_id"])] = found
+    return cand
+
+
+def widen_candidates(students, job_info: Dict[int, dict], cand: Dict[int, Set[int]]):
+    """
+    Add the pairs LSH cannot see because they share no skill token: same-location postings for
+    every student, and every posting for students still left without a candidate (e.g. no skills
+    listed), so minhash mode never makes a student unplaceable that exact mode would place.
+    Only cgpa-only pairs of students that do have candidates are still skipped.
+    Returns ({student_id: {internship_id, ...}}, number of students scored exhaustively)
+    """
+    by_loc = defaultdict(set)
+    for jid, j in job_info.items():
+        if j["location"]:
+            by_loc[j["location"].lower()].add(jid)
+
+    out, exhaustive = {}, 0
+    for s in students:
+        sid = int(s["student_id"])
+        got = cand.get(sid, set()) | by_loc.get((s["location_pref"] or "").lower(), set())
+        if not got:
+            got = set(job_info)
+            exhaustive += 1
+        out[sid] = got
+    return out, exhaustive
+
+
+def lsh_recall(students, job_info: Dict[int, dict], cand: Dict[int, Set[int]], threshold: float,
+               sample: int) -> dict:
+    """
+    Recall of LSH candidates on a fixed student sample.
+      recall: vs every pair with skill overlap (jaccard > 0), i.e. the semantic pairs exact mode scores
+      recall_at_threshold: vs pairs with jaccard >= threshold only (what the banding is tuned for)
+    """
+    picked = random.Random(7).sample(list(students), min(sample, len(students)))
+    j_toks = {jid: tokens(j["req_skills_text"]) for jid, j in job_info.items()}
+    want = hit = want_thr = hit_thr = 0
+    for s in picked:
+        s_toks = tokens(s["skills_text"] or "")
+        if not s_toks:
+            continue
+        got = cand.get(int(s["student_id"]), ())
+        for jid, jt in j_toks.items():
+            inter = len(s_toks & jt)
+            if not inter:
+                continue
+            found = jid in got
+            want += 1
+            hit += found
+            if inter / len(s_toks | jt) >= threshold:
+                want_thr += 1
+                hit_thr += found
+    return {
+        "sample_students": len(picked),
+        "overlap_pairs": want,
+        "recall": round(hit / want, 4) if want else None,
+        "threshold_pairs": want_thr,
+        "recall_at_threshold": round(hit_thr / want_thr, 4) if want_thr else None,
+    }
+
+
+def build_waitlists(pairs, assigned, size: int) -> Dict[int, list]:
+    """Top-`size` unassigned eligible candidates per internship: {jid: [(sid, score, comp), ...]}"""
+    lists = defaultdict(list)
+    if size <= 0:
+        return lists
+    for score, sid, jid, comp in pairs:  # sorted desc
+        if sid in assigned:
+            continue
+        wl = lists[jid]
+        if len(wl) < size:
+            wl.append((sid, score, comp))
+    return lists
+
+
+async def replace_waitlists(db: AsyncSession, run_id: int, internship_ids, lists: Dict[int, list]):
+    """
+    Make `lists` the waitlist of each internship in `internship_ids` (empty if it has no list):
+    older rows are deleted, so the table stays at most waitlist_size rows per internship.
+    """
+    if internship_ids:
+        await db.execute(text("""
+            DELETE FROM internship_waitlist WHERE internship_id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": tuple(internship_ids)})
+    rows = []
+    for jid, wl in lists.items():
+        for rank, (sid, score, comp) in enumerate(wl, 1):
+            rows.append({
+                "run_id": run_id,
+                "internship_id": jid,
+                "ranked": rank,
+                "student_id": sid,
+                "score": float(round(score, 4)),
+                "sem_score": comp[0],
+                "loc_score": comp[1],
+                "cgpa_score": comp[2],
+            })
+    if not rows:
+        return
+    await db.execute(text("""
+        INSERT INTO internship_waitlist
+          (run_id, internship_id, ranked, student_id, score, sem_score, loc_score, cgpa_score)
+        VALUES
+          (:run_id, :internship_id, :ranked, :student_id, :score, :sem_score, :loc_score, :cgpa_score)
+    """), rows)
+
+
+async def record_run(db: AsyncSession, params: dict, metrics: Optional[dict] = None,
+                     run_id: Optional[int] = None) -> int:
+    """Insert a SUCCESS alloc_run row, or finalize a pre-created RUNNING one. Returns run_id"""
+    args = {
+        "p": json.dumps(params),
+        "m": json.dumps(metrics) if metrics is not None else None,
+    }
+    if run_id is None:
+        return int((await db.execute(text("""
+            INSERT INTO alloc_run (status, params_json, metrics_json)
+            VALUES ('SUCCESS', CAST(:p AS JSON), CAST(:m AS JSON))
+        """), args)).lastrowid)
+
+    await db.execute(text("""
+        UPDATE alloc_run
+        SET status='SUCCESS', params_json=CAST(:p AS JSON), metrics_json=CAST(:m AS JSON)
+        WHERE run_id=:rid
+    """), {**args, "rid": run_id})
+    return int(run_id)
+
+
 # ---------- Core Allocation ----------
+def solve_allocation(students, job_info: Dict[int, dict], open_jobs: List[int], candidate_mode: str = "exact",
+                     lsh_bands: int = 32, lsh_rows: int = 1, recall_sample: int = 200,
+                     improve_budget_ms: int = 0, waitlist_size: int = 0, progress: Optional[Progress] = None):
+    """
+    CPU-bound part of an allocation: score pairs, greedy, local search, waitlists.
+    No I/O, so callers run it in an executor thread (Progress is safe to call from there).
+    Returns (assigned, metrics, waitlists, pairs_scored)
+    """
+    # 7. Score student-job pairs
+    metrics = {"candidate_mode": candidate_mode}
+    cand = None
+    if candidate_mode == "minhash":
+        open_info = {jid: job_info[jid] for jid in open_jobs}
+        lsh = lsh_candidates(students, open_info, lsh_bands, lsh_rows)
+        thr = lsh_threshold(lsh_bands, lsh_rows)
+        cand, exhaustive = widen_candidates(students, open_info, lsh)
+        metrics["lsh"] = {
+            "bands": lsh_bands,
+            "rows": lsh_rows,
+            "threshold": round(thr, 4),
+            "lsh_pairs": sum(len(c) for c in lsh.values()),
+            "candidate_pairs": sum(len(c) for c in cand.values()),
+            "exhaustive_pairs": len(students) * len(open_jobs),
+            "exhaustive_students": exhaustive,
+            **lsh_recall(students, open_info, lsh, thr, recall_sample),
+        }
+
+    pairs = []
+    total = len(students)
+    for n, s in enumerate(students, 1):
+        if progress:
+            progress.tick("scoring", students_done=n, students=total, pairs=len(pairs))
+        for jid in (open_jobs if cand is None else cand.get(int(s["student_id"]), ())):
+            j = job_info[jid]
+            if j["remaining"] <= 0:
+                continue
+            scored = score_pair(s, j)
+            if scored is None:
+                continue
+            pairs.append((scored[0], int(s["student_id"]), int(jid), scored[1]))
+
+    pairs.sort(reverse=True, key=lambda x: x[0])
+    metrics["pairs_scored"] = len(pairs)
+    if progress:
+        progress.phase("scored", students=total, pairs=len(pairs))
+
+    # 8. Greedy allocation
+    remaining = {jid: job_info[jid]["remaining"] for jid in open_jobs}
+    assigned = greedy_assign(pairs, remaining)
+    metrics["greedy_score"] = round(sum(a[1] for a in assigned.values()), 4)
+
+    # 8b. Local-search improvement within the time budget
+    if improve_budget_ms > 0:
+        metrics.update(improve_assignment(pairs, assigned, remaining, improve_budget_ms))
+    metrics["assigned"] = len(assigned)
+    if progress:
+        progress.phase("assigned", seats_filled=len(assigned), seats_open=sum(job_info[j]["remaining"] for j in open_jobs))
+
+    return assigned, metrics, build_waitlists(pairs, assigned, waitlist_size), len(pairs)
+
+
 async def run_allocation(
     db: AsyncSession,
     scope_emails: Optional[List[str]] = None,
     respect_existing: bool = True,
+    candidate_mode: str = "exact",
+    lsh_bands: int = 32,
+    lsh_rows: int = 1,
+    recall_sample: int = 200,
+    improve_budget_ms: int = 50,
+    waitlist_size: int = 20,
+    run_id: Optional[int] = None,
+    progress: Optional[Progress] = None,
+    lock_timeout: int = 10,
 ):
     """
     Incremental allocation:
       - If respect_existing=True: freeze last successful run's matches, reduce internship capacity.
       - If scope_emails provided: only consider those students for new allocation.
+      - candidate_mode="minhash": score pairs retrieved by MinHash-LSH over skill tokens, plus
+        same-location postings, plus every posting for students with no candidate at all (see
+        widen_candidates); LSH recall vs the overlapping pairs exact mode scores goes in metrics_json.
+      - improve_budget_ms > 0: local-search pass (swaps / ejection chains) after greedy, within that budget.
+      - waitlist_size: persist that many ranked unassigned candidates per internship for backfill,
+        replacing each scored internship's previous list. Scoped runs see only part of the
+        candidates, so they leave the existing lists alone.
+      - run_id: finalize this pre-created RUNNING run instead of inserting a new one.
+      - progress: receives per-phase events (see app/progress.py).
+    Runs under GLOBAL_LOCK plus the region lock of every active internship, so it cannot race
+    sharded, delta or backfill runs for the same seats. Raises RuntimeError if a lock times out.
     Returns: run_id
     """
+    regions = await _active_regions(db)
+    names = [GLOBAL_LOCK] + sorted({lock_name(k) for k in regions})
+    async with locked_connection(names, lock_timeout) as conn:
+        return await _allocate(
+            conn, regions, scope_emails, respect_existing, candidate_mode, lsh_bands, lsh_rows,
+            recall_sample, improve_budget_ms, waitlist_size, run_id, progress,
+        )
+
+
+async def _active_regions(db: AsyncSession, ids: Optional[tuple] = None) -> Set[str]:
+    """Region keys of active internships (all, or just `ids`); ends the read so the locked part starts fresh"""
+    if ids is None:
+        rows = (await db.execute(text("""
+            SELECT i.pincode, i.location FROM internship i WHERE i.is_active = 1
+        """))).all()
+    else:
+        rows = (await db.execute(text("""
+            SELECT i.pincode, i.location FROM internship i
+            WHERE i.is_active = 1 AND i.internship_id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": ids})).all()
+    await db.commit()
+    return {region_key(pin, loc) for pin, loc in rows}
+
+
+async def _allocate(db: AsyncConnection, regions: Set[str], scope_emails, respect_existing, candidate_mode,
+                    lsh_bands, lsh_rows, recall_sample, improve_budget_ms, waitlist_size, run_id, progress):
+    """Body of run_allocation; `db` is the connection holding the locks for `regions`."""
 
     # 1. Latest successful run
     latest_run_id = (await db.execute(text("""
@@ -52,11 +509,14 @@ async def run_allocation(
     frozen_students = set()
     used_by_internship = defaultdict(int)
 
+    # RUNNING too: a sharded run commits shard by shard before it is marked SUCCESS.
+    # Withdrawn students keep their rows as history but no longer hold a seat.
     rows = (await db.execute(text("""
         SELECT mr.student_id, mr.internship_id
         FROM match_result mr
         JOIN alloc_run ar ON ar.run_id = mr.run_id
-        WHERE ar.status = 'SUCCESS'
+        WHERE ar.status IN ('SUCCESS', 'RUNNING')
+          AND NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = mr.student_id)
     """))).mappings().all()
 
     for r in rows:
@@ -73,6 +533,8 @@ async def run_allocation(
 
     job_info = {}
     for j in jobs:
+        if region_key(j["pincode"], j["location"]) not in regions:
+            continue  # activated after the locks were taken: left to its own delta run
         iid = int(j["internship_id"])
         cap = int(j["capacity"])
         rem = cap - used_by_internship.get(iid, 0)
@@ -88,8 +550,8 @@ async def run_allocation(
             "min_cgpa": float(j["min_cgpa"] or 0.0),
         }
 
-    # 4. Build WHERE conditions for students
-    where = ["1=1"]
+    # 4. Build WHERE conditions for students (withdrawn students are never placed again)
+    where = ["NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = s.student_id)"]
     params = {}
 
     scope_emails = [e.strip() for e in (scope_emails or []) if e and e.strip()]
@@ -101,16 +563,19 @@ async def run_allocation(
         where.append("s.student_id NOT IN :frozen")
         params["frozen"] = tuple(frozen_students)
 
+    run_params = {
+        "respect_existing": 1 if respect_existing else 0,
+        "scoped": 1 if bool(scope_emails) else 0,
+        "weights": WEIGHTS,
+    }
+
     # short-circuit if scope provided but ended up empty
     if ("emails" in params) and not params["emails"]:
-        rid = (await db.execute(text("""
-            INSERT INTO alloc_run (status, params_json, metrics_json)
-            VALUES ('SUCCESS',
-                    JSON_OBJECT('respect_existing', :re, 'scoped', 1, 'note','empty scope'),
-                    NULL)
-        """), {"re": 1 if respect_existing else 0})).lastrowid
+        rid = await record_run(db, {**run_params, "note": "empty scope"}, run_id=run_id)
         await db.commit()
-        return int(rid)
+        if progress:
+            progress.done(assigned=0, note="empty scope")
+        return rid
 
     # 5. Fetch eligible students
     sel = text(f"""
@@ -127,96 +592,151 @@ async def run_allocation(
     students = (await db.execute(sel, params)).mappings().all()
 
     if not students:
-        rid = (await db.execute(text("""
-            INSERT INTO alloc_run (status, params_json, metrics_json)
-            VALUES ('SUCCESS',
-                    JSON_OBJECT('respect_existing', :re, 'scoped', :sc),
-                    JSON_OBJECT('note','no eligible students in scope'))
-        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).lastrowid
+        rid = await record_run(db, run_params, {"note": "no eligible students in scope"}, run_id=run_id)
         await db.commit()
-        return int(rid)
+        if progress:
+            progress.done(assigned=0, note="no eligible students in scope")
+        return rid
 
     # 6. Filter open jobs
     open_jobs = [jid for jid, info in job_info.items() if info["remaining"] > 0]
+    if progress:
+        progress.phase("students_loaded", students=len(students), open_internships=len(open_jobs),
+                       frozen=len(frozen_students))
     if not open_jobs:
-        rid = (await db.execute(text("""
-            INSERT INTO alloc_run (status, params_json, metrics_json)
-            VALUES ('SUCCESS',
-                    JSON_OBJECT('respect_existing', :re, 'scoped', :sc),
-                    JSON_OBJECT('note','no open capacity'))
-        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).lastrowid
+        rid = await record_run(db, run_params, {"note": "no open capacity"}, run_id=run_id)
         await db.commit()
-        return int(rid)
+        if progress:
+            progress.done(assigned=0, note="no open capacity")
+        return rid
+
+    # 7-8. Scoring, greedy and local search are CPU-bound: off the event loop, so progress
+    #      events (and every other request) keep flowing while they run
+    assigned, metrics, lists, npairs = await asyncio.get_running_loop().run_in_executor(None, partial(
+        solve_allocation, students, job_info, open_jobs, candidate_mode=candidate_mode,
+        lsh_bands=lsh_bands, lsh_rows=lsh_rows, recall_sample=recall_sample,
+        improve_budget_ms=improve_budget_ms, waitlist_size=0 if scope_emails else waitlist_size,
+        progress=progress,
+    ))
 
-    # 7. Score student-job pairs
-    pairs = []
-    for s in students:
-        for jid in open_jobs:
-            j = job_info[jid]
-            if j["remaining"] <= 0:
-                continue
-            # eligibility check
-            cg_ok = (s["cgpa"] is None) or (float(s["cgpa"]) >= j["min_cgpa"])
-            if not cg_ok:
-                continue
+    # 9. Record run + matches
+    rid = await record_run(db, {
+        **run_params,
+        "frozen_count": len(frozen_students),
+        "candidate_mode": candidate_mode,
+    }, metrics, run_id=run_id)
 
-            sem = jaccard(s["skills_text"] or "", j["req_skills_text"])
-            cg = norm(float(s["cgpa"]) if s["cgpa"] is not None else 0.0, 6.0, 9.5) if j["min_cgpa"] > 0 else 0.0
-            loc = 1.0 if (s["location_pref"] and j["location"] and s["location_pref"].lower() == j["location"].lower()) else 0.0
+    await insert_matches(db, rid, assigned)
+    if not scope_emails:
+        await replace_waitlists(db, rid, open_jobs, lists)
 
-            score = 0.65 * sem + 0.20 * loc + 0.15 * cg
-            if score <= 0:
-                continue
+    await db.commit()
+    if progress:
+        progress.done(assigned=len(assigned), pairs=npairs)
+    return rid
 
-            pairs.append((score, int(s["student_id"]), int(jid), {
-                "semantic": round(sem, 4),
-                "location": loc,
-                "cgpa_norm": round(cg, 4),
-                "weights": {"sem": 0.65, "loc": 0.20, "cg": 0.15}
-            }))
 
-    pairs.sort(reverse=True, key=lambda x: x[0])
+# ---------- Delta Allocation ----------
+async def run_delta_allocation(db: AsyncSession, internship_ids: List[int], waitlist_size: int = 20,
+                               lock_timeout: int = 10):
+    """
+    Delta allocation for new internships / capacity increases:
+      - Only the given internships are scored, against their remaining capacity.
+      - Only students without a placement in any successful or running run are considered,
+        so existing placements stay frozen.
+    Runs under the region locks of the given internships. Raises RuntimeError if a lock times out.
+    Returns: run_id, or None if there was nothing to allocate.
+    """
+    ids = tuple(sorted({int(i) for i in (internship_ids or [])}))
+    if not ids:
+        return None
 
-    # 8. Greedy allocation
-    assigned = {}
-    remaining = {jid: job_info[jid]["remaining"] for jid in open_jobs}
+    regions = await _active_regions(db, ids)
+    if not regions:
+        return None
+    async with locked_connection(sorted({lock_name(k) for k in regions}), lock_timeout) as conn:
+        return await allocate_delta(conn, ids, waitlist_size)
 
-    for score, sid, jid, comp in pairs:
-        if sid in assigned:
-            continue
-        if remaining.get(jid, 0) <= 0:
+
+async def allocate_delta(db: AsyncConnection, internship_ids: List[int], waitlist_size: int = 20):
+    """run_delta_allocation body, for callers that already hold the region locks of `internship_ids`"""
+    ids = tuple(sorted({int(i) for i in (internship_ids or [])}))
+    if not ids:
+        return None
+
+    # 1. Target internships with their used seats
+    jobs = (await db.execute(text("""
+        SELECT i.internship_id, i.title, i.location, i.pincode, i.capacity,
+               i.req_skills_text, i.min_cgpa, COALESCE(u.used, 0) AS used
+        FROM internship i
+        LEFT JOIN (
+            SELECT mr.internship_id, COUNT(*) AS used
+            FROM match_result mr
+            JOIN alloc_run ar ON ar.run_id = mr.run_id
+            WHERE ar.status IN ('SUCCESS', 'RUNNING') AND mr.internship_id IN :ids
+              AND NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = mr.student_id)
+            GROUP BY mr.internship_id
+        ) u ON u.internship_id = i.internship_id
+        WHERE i.is_active = 1 AND i.internship_id IN :ids
+    """).bindparams(bindparam("ids", expanding=True)), {"ids": ids})).mappings().all()
+
+    job_info = {}
+    for j in jobs:
+        rem = int(j["capacity"]) - int(j["used"])
+        if rem <= 0:
             continue
-        assigned[sid] = (jid, score, comp)
-        remaining[jid] -= 1
+        job_info[int(j["internship_id"])] = {
+            "title": j["title"],
+            "location": j["location"],
+            "pincode": j["pincode"],
+            "capacity": int(j["capacity"]),
+            "remaining": rem,
+            "req_skills_text": j["req_skills_text"] or "",
+            "min_cgpa": float(j["min_cgpa"] or 0.0),
+        }
+    if not job_info:
+        return None
 
-    # 9. Record run + matches
+    # 2. Unallocated, not withdrawn students that could clear at least one cgpa bar
+    min_cg = min(j["min_cgpa"] for j in job_info.values())
+    students = (await db.execute(text("""
+        SELECT s.student_id, s.name, s.email, s.cgpa, s.location_pref, s.skills_text
+        FROM student s
+        WHERE (s.cgpa IS NULL OR s.cgpa >= :min_cg)
+          AND NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = s.student_id)
+          AND NOT EXISTS (
+              SELECT 1 FROM match_result mr
+              JOIN alloc_run ar ON ar.run_id = mr.run_id
+              WHERE mr.student_id = s.student_id AND ar.status IN ('SUCCESS', 'RUNNING')
+          )
+    """), {"min_cg": min_cg})).mappings().all()
+    if not students:
+        return None
+
+    # 3. Score + greedy, same rules as the full run (off the event loop)
+    assigned, _, lists, npairs = await asyncio.get_running_loop().run_in_executor(None, partial(
+        solve_allocation, students, job_info, list(job_info), waitlist_size=waitlist_size,
+    ))
+    if not assigned:
+        return None
+
+    # 4. Record the delta run
     rid = (await db.execute(text("""
         INSERT INTO alloc_run (status, params_json, metrics_json)
         VALUES ('SUCCESS',
-                JSON_OBJECT('respect_existing', :re, 'scoped', :sc, 'frozen_count', :fc),
-                NULL)
+                JSON_OBJECT('mode', 'delta', 'respect_existing', 1, 'internships', CAST(:ids AS JSON),
+                            'weights', CAST(:w AS JSON)),
+                JSON_OBJECT('candidates', :nc, 'pairs', :np, 'assigned', :na))
     """), {
-        "re": 1 if respect_existing else 0,
-        "sc": 1 if bool(scope_emails) else 0,
-        "fc": len(frozen_students)
+        "ids": json.dumps(sorted(job_info)),
+        "w": json.dumps(WEIGHTS),
+        "nc": len(students),
+        "np": npairs,
+        "na": len(assigned),
     })).lastrowid
 
-    if assigned:
-        rows = []
-        for sid, (jid, score, comp) in assigned.items():
-            rows.append({
-                "run_id": int(rid),
-                "student_id": sid,
-                "internship_id": jid,
-                "final_score": float(round(score, 4)),
-                "component_json": json.dumps(comp),
-            })
-        await db.execute(text("""
-            INSERT INTO match_result
-              (run_id, student_id, internship_id, final_score, component_json)
-            VALUES
-              (:run_id, :student_id, :internship_id, :final_score, CAST(:component_json AS JSON))
-        """), rows)
-
+    await insert_matches(db, int(rid), assigned)
+    # every unplaced student was scored for these internships: their lists are complete
+    await replace_waitlists(db, int(rid), list(job_info), lists)
     await db.commit()
-    return int(rid)
\ No newline at end of file
+    return int(rid)
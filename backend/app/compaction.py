@@ -0,0 +1,128 @@
+# app/compaction.py
+
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, bindparam
+
+from app.db import engine
+from app.locks import GLOBAL_LOCK, acquire_lock, release_lock
+
+
+async def compact_history(db: AsyncSession, keep_runs: int = 1, lock_timeout: int = 10):
+    """
+    Fold superseded successful runs into one consolidated snapshot run.
+      - The newest `keep_runs` (>= 1) runs with matches stay untouched; the latest run must
+        survive, since v_latest_matches reads it from match_result.
+      - Folded runs' current placements (latest per student) are copied into a new
+        SUCCESS run; their original rows move to match_result_archive.
+      - The archive gets a new run_id range partition, so history can be dropped per range.
+    Hot-path queries over match_result then only see the snapshot + recent runs.
+    The snapshot is tagged mode='compaction' and skipped by /run/latest and v_latest_run.
+    Returns: dict with the snapshot run_id (None if there was nothing to fold).
+    """
+    run_ids = (await db.execute(text("""
+        SELECT ar.run_id
+        FROM alloc_run ar
+        WHERE ar.status = 'SUCCESS'
+          AND EXISTS (SELECT 1 FROM match_result mr WHERE mr.run_id = ar.run_id)
+        ORDER BY ar.run_id DESC
+    """))).scalars().all()
+    await db.commit()
+
+    fold = sorted(int(r) for r in run_ids[max(1, keep_runs):])
+    if len(fold) < 2:
+        return {"snapshot_run_id": None, "folded_runs": 0, "archived_rows": 0}
+
+    lo, hi = fold[0], fold[-1]
+    async with engine.connect() as conn:
+        if not await acquire_lock(conn, GLOBAL_LOCK, lock_timeout):
+            raise RuntimeError("allocation in progress, try again later")
+        try:
+            snap = (await conn.execute(text("""
+                INSERT INTO alloc_run (status, params_json, metrics_json)
+                VALUES ('SUCCESS',
+                        JSON_OBJECT('mode', 'compaction', 'folded_from', :lo, 'folded_to', :hi, 'folded_runs', :n,
+                                    'weights', (SELECT params_json->'$.weights' FROM alloc_run WHERE run_id = :hi)),
+                        NULL)
+            """), {"lo": lo, "hi": hi, "n": len(fold)})).lastrowid
+            snap = int(snap)
+
+            runs_param = {"runs": tuple(fold)}
+
+            # latest placement per student across the folded runs
+            await conn.execute(text("""
+                INSERT INTO match_result
+                  (run_id, student_id, internship_id, allocated_slot, final_score,
+                   sem_score, loc_score, cgpa_score, explanation)
+                SELECT :snap, x.student_id, x.internship_id, x.allocated_slot, x.final_score,
+                       x.sem_score, x.loc_score, x.cgpa_score, x.explanation
+                FROM (
+                    SELECT mr.*, ROW_NUMBER() OVER (PARTITION BY mr.student_id ORDER BY mr.run_id DESC) AS rn
+                    FROM match_result mr
+                    WHERE mr.run_id IN :runs
+                ) x
+                WHERE x.rn = 1
+            """).bindparams(bindparam("runs", expanding=True)), {"snap": snap, **runs_param})
+
+            archived = (await conn.execute(text("""
+                INSERT INTO match_result_archive
+                  (match_id, run_id, student_id, internship_id, allocated_slot, final_score,
+                   sem_score, loc_score, cgpa_score, explanation, created_at)
+                SELECT match_id, run_id, student_id, internship_id, allocated_slot, final_score,
+                       sem_score, loc_score, cgpa_score, explanation, created_at
+                FROM match_result
+                WHERE run_id IN :runs
+            """).bindparams(bindparam("runs", expanding=True)), runs_param)).rowcount
+
+            await conn.execute(text("""
+                DELETE FROM match_result WHERE run_id IN :runs
+            """).bindparams(bindparam("runs", expanding=True)), runs_param)
+
+            await conn.execute(text("""
+                UPDATE alloc_run
+                SET metrics_json = JSON_SET(COALESCE(metrics_json, JSON_OBJECT()), '$.compacted_into', :snap)
+                WHERE run_id IN :runs
+            """).bindparams(bindparam("runs", expanding=True)), {"snap": snap, **runs_param})
+
+            await conn.commit()
+
+            # DDL commits implicitly, so split the catch-all partition only after the data is in
+            await _split_archive_partition(conn, hi + 1)
+        finally:
+            await release_lock(conn, GLOBAL_LOCK)
+
+    return {"snapshot_run_id": snap, "folded_runs": len(fold), "archived_rows": int(archived or 0)}
+
+
+async def _archive_bounds(conn) -> List[int]:
+    rows = (await conn.execute(text("""
+        SELECT PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'match_result_archive'
+          AND PARTITION_DESCRIPTION <> 'MAXVALUE'
+    """))).scalars().all()
+    return sorted(int(r) for r in rows)
+
+
+async def _split_archive_partition(conn, bound: int):
+    """Carve [previous bound, bound) out of p_max as its own partition."""
+    bounds = await _archive_bounds(conn)
+    if bounds and bounds[-1] >= bound:
+        return
+    await conn.execute(text(f"""
+        ALTER TABLE match_result_archive REORGANIZE PARTITION p_max INTO (
+            PARTITION p_{bound} VALUES LESS THAN ({bound}),
+            PARTITION p_max VALUES LESS THAN MAXVALUE
+        )
+    """))
+
+
+async def drop_archive_before(before_run_id: int) -> List[str]:
+    """Retention: drop whole archive partitions that only hold runs < before_run_id."""
+    async with engine.connect() as conn:
+        bounds = [b for b in await _archive_bounds(conn) if b <= before_run_id]
+        if not bounds:
+            return []
+        names = [f"p_{b}" for b in bounds]
+        await conn.execute(text(f"ALTER TABLE match_result_archive DROP PARTITION {', '.join(names)}"))
+    return names
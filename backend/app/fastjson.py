@@ -0,0 +1,62 @@
+# app/fastjson.py
+
+from decimal import Decimal
+from typing import Any, Iterable, Mapping, Optional, Sequence
+import orjson
+from fastapi import Response
+
+
+def _default(obj: Any):
+    """orjson fallback for types it does not serialize natively (datetime/date are native)."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8")
+    raise TypeError
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default)
+
+
+def encode_rows(rows: Iterable[Mapping[str, Any]], raw_json: Sequence[str] = ()) -> bytes:
+    """
+    Encode DB row mappings as a JSON array.
+    Columns listed in raw_json hold JSON text straight from MySQL and are spliced in
+    verbatim (no parse + re-dump); NULL becomes null.
+    """
+    parts = []
+    for r in rows:
+        if not raw_json:
+            parts.append(dumps(dict(r)))
+            continue
+        d = dict(r)
+        raw = [(k, d.pop(k, None)) for k in raw_json]
+        body = dumps(d)
+        tail = []
+        for k, v in raw:
+            if v is None:
+                v = b"null"
+            elif isinstance(v, str):
+                v = v.encode("utf-8")
+            elif not isinstance(v, (bytes, bytearray)):
+                v = dumps(v)  # driver already decoded it
+            tail.append(b'"' + k.encode("utf-8") + b'":' + bytes(v))
+        sep = b"," if len(body) > 2 else b""
+        parts.append(body[:-1] + sep + b",".join(tail) + b"}")
+    return b"[" + b",".join(parts) + b"]"
+
+
+class RowsResponse(Response):
+    """
+    JSON response for large result sets: {**extra, "<key>": [rows...]}.
+    Bypasses jsonable_encoder entirely.
+    """
+    media_type = "application/json"
+
+    def __init__(self, rows: Sequence[Mapping[str, Any]], key: str = "results",
+                 raw_json: Sequence[str] = (), extra: Optional[Mapping[str, Any]] = None, **kwargs):
+        head = dumps(dict(extra or {}))
+        sep = b"," if len(head) > 2 else b""
+        body = head[:-1] + sep + dumps(key) + b":" + encode_rows(rows, raw_json) + b"}"
+        super().__init__(content=body, **kwargs)
@@ -0,0 +1,58 @@
+# app/locks.py
+
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy import text
+
+from app.db import engine
+
+LOCK_PREFIX = "pm_alloc:"
+GLOBAL_LOCK = LOCK_PREFIX + "global"
+
+
+def region_key(pincode: Optional[str], location: Optional[str], prefix_len: int = 2) -> str:
+    """Shard key: pincode prefix (postal circle) if usable, else lowercased location, else '_'."""
+    pin = (pincode or "").strip()
+    if len(pin) >= prefix_len and pin[:prefix_len].isdigit():
+        return "pin:" + pin[:prefix_len]
+    loc = (location or "").strip().lower()
+    return "loc:" + loc if loc else "_"
+
+
+def lock_name(key: str) -> str:
+    # MySQL user-level lock names are capped at 64 chars
+    return (LOCK_PREFIX + key)[:64]
+
+
+async def acquire_lock(conn: AsyncConnection, name: str, timeout: int) -> bool:
+    got = (await conn.execute(text("SELECT GET_LOCK(:n, :t)"), {"n": name, "t": timeout})).scalar()
+    return got == 1
+
+
+async def release_lock(conn: AsyncConnection, name: str):
+    await conn.execute(text("SELECT RELEASE_LOCK(:n)"), {"n": name})
+
+
+@asynccontextmanager
+async def locked_connection(names: List[str], timeout: int):
+    """
+    Dedicated connection holding the named locks (taken in the given order, GLOBAL_LOCK first,
+    then region locks sorted, so multi-lock holders cannot deadlock each other).
+    GET_LOCK is connection-scoped, so all reads and writes of the locked section go through it.
+    Raises RuntimeError if a lock is not granted within `timeout` seconds.
+    """
+    async with engine.connect() as conn:
+        held = []
+        try:
+            for name in names:
+                if not await acquire_lock(conn, name, timeout):
+                    raise RuntimeError(f"{name} is held by another allocation, try again later")
+                held.append(name)
+            yield conn
+        finally:
+            # anything uncommitted is dropped before the seats are handed to the next holder
+            await conn.rollback()
+            for name in reversed(held):
+                await release_lock(conn, name)
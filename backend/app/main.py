@@ -5,6 +5,7 @@ from app.routers.students import router as students_router
 from app.routers.runs import router as runs_router
 from app.routers.downloads import router as downloads_router
 from app.routers.internships import router as internships_router
+from app.routers.recommendations import router as recommendations_router
 
 
 app = FastAPI(title="PM Internship Allocation API", version="1.0")
@@ -21,4 +22,5 @@ app.include_router(health_router)
 app.include_router(students_router)
 app.include_router(runs_router)
 app.include_router(downloads_router)
-app.include_router(internships_router)
\ No newline at end of file
+app.include_router(internships_router)
+app.include_router(recommendations_router)
\ No newline at end of file
@@ -270,7 +270,10 @@ class MatchResult(Base):
 
     allocated_slot: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     final_score: Mapped[float] = mapped_column(DECIMAL(6, 4), nullable=False)
-    component_json: Mapped[Optional[Dict]] = mapped_column(JSON)
+    # score components; weights live once per run in alloc_run.params_json (see v_match_result)
+    sem_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+    loc_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+    cgpa_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
     explanation: Mapped[Optional[str]] = mapped_column(Text)
     created_at: Mapped["DateTime"] = mapped_column(DateTime, nullable=False)
 
@@ -279,6 +282,48 @@ class MatchResult(Base):
     internship: Mapped["Internship"] = relationship(back_populates="matches")
 
 
+class MatchResultArchive(Base):
+    """Folded match rows from compacted runs (range-partitioned by run_id, no FKs)."""
+    __tablename__ = "match_result_archive"
+
+    run_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    match_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    student_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    internship_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    allocated_slot: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    final_score: Mapped[float] = mapped_column(DECIMAL(6, 4), nullable=False)
+    # score components; weights live once per run in alloc_run.params_json (see v_match_result)
+    sem_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+    loc_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+    cgpa_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+    explanation: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped["DateTime"] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped["DateTime"] = mapped_column(DateTime, nullable=False)
+
+
+class InternshipWaitlist(Base):
+    __tablename__ = "internship_waitlist"
+
+    internship_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("internship.internship_id"), primary_key=True)
+    run_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("alloc_run.run_id"), primary_key=True)
+    ranked: Mapped[int] = mapped_column(Integer, primary_key=True)
+    student_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("student.student_id"), nullable=False)
+
+    score: Mapped[float] = mapped_column(DECIMAL(6, 4), nullable=False)
+    sem_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+    loc_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+    cgpa_score: Mapped[Optional[float]] = mapped_column(DECIMAL(6, 4))
+
+
+class StudentWithdrawal(Base):
+    __tablename__ = "student_withdrawal"
+
+    student_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("student.student_id"), primary_key=True)
+    internship_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey("internship.internship_id"))
+    withdrawn_at: Mapped["DateTime"] = mapped_column(DateTime, nullable=False)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_log"
 
@@ -0,0 +1,94 @@
+# app/progress.py
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Set
+
+TERMINAL = ("done", "failed")
+
+
+class ProgressHub:
+    """
+    In-process pub/sub for allocation progress, keyed by run_id.
+    Keeps the last event per run so late subscribers see the current state.
+    """
+
+    def __init__(self, keep_last: int = 256):
+        self._subs: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._last: "OrderedDict[int, dict]" = OrderedDict()
+        self._keep_last = keep_last
+
+    def publish(self, run_id: int, event: dict):
+        self._last[run_id] = event
+        self._last.move_to_end(run_id)
+        while len(self._last) > self._keep_last:
+            self._last.popitem(last=False)
+        for q in self._subs.get(run_id, ()):
+            q.put_nowait(event)
+
+    def last(self, run_id: int) -> Optional[dict]:
+        return self._last.get(run_id)
+
+    def active(self) -> Optional[int]:
+        """Most recent run still in progress, if any"""
+        for rid, ev in reversed(self._last.items()):
+            if ev["type"] not in TERMINAL:
+                return rid
+        return None
+
+    def subscribe(self, run_id: int) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue()
+        self._subs[run_id].add(q)
+        return q
+
+    def unsubscribe(self, run_id: int, q: asyncio.Queue):
+        subs = self._subs.get(run_id)
+        if subs is not None:
+            subs.discard(q)
+            if not subs:
+                del self._subs[run_id]
+
+
+hub = ProgressHub()
+
+
+class Progress:
+    """
+    Publisher handed to the allocator. phase()/done()/failed() always publish;
+    tick() is throttled to one event per `min_interval` seconds so it can sit in hot loops.
+    Create it on the event loop; calls from executor threads are handed back to that loop.
+    """
+
+    def __init__(self, run_id: int, min_interval: float = 0.25):
+        self.run_id = run_id
+        self.min_interval = min_interval
+        self._next = 0.0
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.get_ident()
+
+    def _emit(self, type_: str, data: dict):
+        event = {"type": type_, "run_id": self.run_id, **data}
+        if threading.get_ident() == self._thread:
+            hub.publish(self.run_id, event)
+        else:
+            # hub queues are not thread-safe; FIFO keeps these ahead of the loop's own done()
+            self._loop.call_soon_threadsafe(hub.publish, self.run_id, event)
+
+    def phase(self, name: str, **data):
+        self._emit(name, data)
+        self._next = time.monotonic() + self.min_interval
+
+    def tick(self, name: str, **data):
+        now = time.monotonic()
+        if now < self._next:
+            return
+        self._next = now + self.min_interval
+        self._emit(name, data)
+
+    def done(self, **data):
+        self._emit("done", data)
+
+    def failed(self, error: str):
+        self._emit("failed", {"error": error})
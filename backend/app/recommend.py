@@ -0,0 +1,271 @@
+# app/recommend.py
+
+import asyncio
+import bisect
+import heapq
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, bindparam
+
+from app.allocation import W_CG, W_LOC, W_SEM, norm, score_pair, tokens
+
+# incremental refresh re-reads rows this far behind the watermark: a long transaction (a bulk
+# import) commits rows stamped earlier than rows another refresh has already indexed
+REFRESH_OVERLAP_SECONDS = 300
+# full rebuild this often regardless, for anything older than that (and deleted postings)
+FULL_REBUILD_SECONDS = 900
+
+
+class InternshipIndex:
+    """
+    In-memory index of active internships for top-K recommendations.
+    Scores with allocation.score_pair(), so results match what run_allocation would score.
+      - by_token[token][(n, loc, has_cg)]: postings that can get a semantic component, grouped by
+        token count, location and whether they set a cgpa bar: everything that bounds their score,
+        so top_k can skip whole groups
+      - without skill overlap a posting scores one of only a few levels (location match, cgpa bar),
+        so those are kept as buckets and only k of each are ever scored:
+          loc_plain[loc]: ids with min_cgpa == 0, loc_cg[loc] / cg_jobs: sorted (min_cgpa, id) with min_cgpa > 0
+    Refreshed incrementally from internship.updated_at (with an overlap window) and rebuilt every
+    FULL_REBUILD_SECONDS; mark_dirty() forces a refresh on next use.
+    """
+
+    def __init__(self, max_age_seconds: float = 30.0):
+        self.max_age = max_age_seconds
+        self._reset()
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+
+    def _reset(self):
+        self.jobs: Dict[int, dict] = {}
+        self.by_token: Dict[str, Dict[tuple, Set[int]]] = defaultdict(dict)
+        self.loc_plain: Dict[str, Set[int]] = defaultdict(set)
+        self.loc_cg: Dict[str, List[tuple]] = defaultdict(list)
+        self.cg_jobs: List[tuple] = []
+        self.watermark = None
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    # ---------- maintenance ----------
+    def _remove(self, jid: int):
+        j = self.jobs.pop(jid, None)
+        if j is None:
+            return
+        g = _group(j)
+        for t in j["tokens"]:
+            groups = self.by_token.get(t)
+            ids = groups.get(g) if groups is not None else None
+            if ids is not None:
+                ids.discard(jid)
+                if not ids:
+                    del groups[g]
+                    if not groups:
+                        del self.by_token[t]
+        loc = j["loc_key"]
+        if j["min_cgpa"] > 0:
+            _sorted_discard(self.cg_jobs, (j["min_cgpa"], jid))
+            if loc:
+                _sorted_discard(self.loc_cg[loc], (j["min_cgpa"], jid))
+                if not self.loc_cg[loc]:
+                    del self.loc_cg[loc]
+        elif loc:
+            ids = self.loc_plain.get(loc)
+            if ids is not None:
+                ids.discard(jid)
+                if not ids:
+                    del self.loc_plain[loc]
+
+    def _upsert(self, r):
+        jid = int(r["internship_id"])
+        self._remove(jid)
+        if not r["is_active"]:
+            return
+        loc = (r["location"] or "").lower()
+        j = {
+            "internship_id": jid,
+            "title": r["title"],
+            "org_name": r["org_name"],
+            "location": r["location"],
+            "pincode": r["pincode"],
+            "capacity": int(r["capacity"]),
+            "req_skills_text": r["req_skills_text"] or "",
+            "min_cgpa": float(r["min_cgpa"] or 0.0),
+            "tokens": tokens(r["req_skills_text"] or ""),
+            "loc_key": loc,
+        }
+        self.jobs[jid] = j
+        for t in j["tokens"]:
+            self.by_token[t].setdefault(_group(j), set()).add(jid)
+        if j["min_cgpa"] > 0:
+            bisect.insort(self.cg_jobs, (j["min_cgpa"], jid))
+            if loc:
+                bisect.insort(self.loc_cg[loc], (j["min_cgpa"], jid))
+        elif loc:
+            self.loc_plain[loc].add(jid)
+
+    async def refresh(self, db: AsyncSession):
+        """Load rows changed since the watermark minus the overlap (everything on first use / rebuild)."""
+        full = self.watermark is None or time.monotonic() - self._built_at > FULL_REBUILD_SECONDS
+        where, params = "", {}
+        if not full:
+            # re-applying a row is idempotent, so overlapping reads only cost the re-read
+            where = "WHERE i.updated_at >= :wm - INTERVAL :ov SECOND"
+            params = {"wm": self.watermark, "ov": REFRESH_OVERLAP_SECONDS}
+        rows = (await db.execute(text(f"""
+            SELECT i.internship_id, i.title, COALESCE(i.org_name, o.org_name) AS org_name,
+                   i.location, i.pincode, i.capacity, i.req_skills_text, i.min_cgpa,
+                   i.is_active, i.updated_at
+            FROM internship i
+            LEFT JOIN organization o ON o.org_id = i.org_id
+            {where}
+        """), params)).mappings().all()
+        if full:
+            self._reset()
+            self._built_at = time.monotonic()
+        for r in rows:
+            self._upsert(r)
+            if self.watermark is None or r["updated_at"] > self.watermark:
+                self.watermark = r["updated_at"]
+
+    async def ensure_fresh(self, db: AsyncSession):
+        if not self._dirty and time.monotonic() - self._checked_at < self.max_age:
+            return
+        async with self._lock:
+            if not self._dirty and time.monotonic() - self._checked_at < self.max_age:
+                return
+            self._dirty = False
+            await self.refresh(db)
+            self._checked_at = time.monotonic()
+
+    # ---------- queries ----------
+    def top_k(self, s, k: int) -> List[dict]:
+        """
+        Exact top-k with max-score pruning over the token postings:
+          - no-overlap buckets are scored first, which sets an initial k-th score to beat
+          - tokens go rarest first; once the k-th score reaches the bound of a posting not seen yet,
+            W_SEM * r/m + location + cgpa (r of the student's m tokens left), the rest is skipped
+          - within a token, groups go by bound (their size, location and cgpa bar), and the rest
+            of the token is skipped once a group's bound cannot beat the k-th score
+        """
+        if k <= 0:
+            return []
+        s_toks = tokens(s["skills_text"] or "")
+        loc = (s["location_pref"] or "").lower()
+        cg_bar = float(s["cgpa"]) if s["cgpa"] is not None else None
+        loc_max = W_LOC if loc else 0.0
+        cg_max = W_CG * norm(cg_bar, 6.0, 9.5) if cg_bar is not None else 0.0
+
+        top: List[tuple] = []  # min-heap of (score, jid, comp), at most k entries
+        seen: Set[int] = set()
+
+        def consider(jid):
+            j = self.jobs[jid]
+            res = score_pair(s, j, s_toks, j["tokens"])
+            if res is None:
+                return
+            if len(top) < k:
+                heapq.heappush(top, (res[0], jid, res[1]))
+            elif res[0] > top[0][0]:
+                heapq.heapreplace(top, (res[0], jid, res[1]))
+
+        # no-overlap postings score the same within each bucket: any k eligible ones will do
+        if loc:
+            _take(self.loc_plain.get(loc, ()), k, seen)
+            # no cgpa on file passes every bar (same rule as score_pair)
+            _take(_eligible(self.loc_cg.get(loc, []), cg_bar if cg_bar is not None else float("inf")), k, seen)
+        if cg_max > 0:
+            _take(_eligible(self.cg_jobs, cg_bar), k, seen)
+        for jid in seen:
+            consider(jid)
+
+        m = len(s_toks)
+        lists = [self.by_token.get(t, {}) for t in s_toks]
+        lists.sort(key=lambda groups: sum(len(ids) for ids in groups.values()))
+        for i, groups in enumerate(lists):
+            r = m - i  # a posting first met here shares at most r tokens, so jaccard <= r / m
+            if len(top) == k and top[0][0] >= W_SEM * r / m + loc_max + cg_max:
+                break
+            bounded = []
+            for (n, j_loc, has_cg), ids in groups.items():
+                c = min(r, n)
+                ub = (W_SEM * c / (m + n - c) + (W_LOC if loc and j_loc == loc else 0.0)
+                      + (cg_max if has_cg else 0.0))
+                bounded.append((ub, ids))
+            bounded.sort(key=lambda x: x[0], reverse=True)
+            for ub, ids in bounded:
+                # skipped postings stay unseen: a later token can only bound them lower
+                if len(top) == k and top[0][0] >= ub:
+                    break
+                for jid in ids:
+                    if jid not in seen:
+                        seen.add(jid)
+                        consider(jid)
+
+        out = []
+        for score, jid, comp in sorted(top, reverse=True):
+            j = self.jobs[jid]
+            out.append({
+                "internship_id": jid,
+                "title": j["title"],
+                "org_name": j["org_name"],
+                "location": j["location"],
+                "pincode": j["pincode"],
+                "capacity": j["capacity"],
+                "min_cgpa": j["min_cgpa"],
+                "score": round(score, 4),
+                "semantic": comp[0],
+                "location_match": comp[1],
+                "cgpa_norm": comp[2],
+            })
+        return out
+
+
+def _group(j: dict) -> tuple:
+    return len(j["tokens"]), j["loc_key"], j["min_cgpa"] > 0
+
+
+def _sorted_discard(lst: List[tuple], item: tuple):
+    i = bisect.bisect_left(lst, item)
+    if i < len(lst) and lst[i] == item:
+        del lst[i]
+
+
+def _eligible(cg_sorted: List[tuple], cgpa: float):
+    """ids whose min_cgpa <= cgpa from a (min_cgpa, id) sorted list"""
+    hi = bisect.bisect_right(cg_sorted, (cgpa, float("inf")))
+    return (cg_sorted[i][1] for i in range(hi))
+
+
+def _take(ids, k: int, cand: Set[int]):
+    added = 0
+    for jid in ids:
+        if added >= k:
+            break
+        if jid not in cand:
+            cand.add(jid)
+            added += 1
+
+
+index = InternshipIndex()
+
+
+async def load_students(db: AsyncSession, student_ids: List[int]) -> Dict[int, dict]:
+    rows = (await db.execute(text("""
+        SELECT s.student_id, s.cgpa, s.location_pref, s.skills_text
+        FROM student s
+        WHERE s.student_id IN :ids
+    """).bindparams(bindparam("ids", expanding=True)), {"ids": tuple(student_ids)})).mappings().all()
+    return {int(r["student_id"]): r for r in rows}
+
+
+async def recommend(db: AsyncSession, student_ids: List[int], k: int) -> Dict[int, Optional[List[dict]]]:
+    """Top-k internships per student (None for unknown ids). Nothing is written."""
+    await index.ensure_fresh(db)
+    students = await load_students(db, student_ids)
+    return {sid: (index.top_k(students[sid], k) if sid in students else None) for sid in student_ids}
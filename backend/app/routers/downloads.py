@@ -13,11 +13,16 @@ async def download_csv(run_id: int, db: AsyncSession = Depends(get_db)):
                i.internship_id, i.title AS internship_title,
                COALESCE(i.org_name, o.org_name) AS organization,
                i.location, i.pincode, mr.final_score
-        FROM match_result mr
+        FROM (
+            SELECT student_id, internship_id, final_score
+            FROM match_result WHERE run_id = :rid
+            UNION ALL
+            SELECT student_id, internship_id, final_score
+            FROM match_result_archive WHERE run_id = :rid
+        ) mr
         JOIN student s ON s.student_id = mr.student_id
         JOIN internship i ON i.internship_id = mr.internship_id
         LEFT JOIN organization o ON o.org_id = i.org_id
-        WHERE mr.run_id = :rid
         ORDER BY mr.final_score DESC
     """), {"rid": run_id})).mappings().all()
 
@@ -1,38 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
-import json
+from pydantic import BaseModel, Field, ValidationError, validator
+import json, re, time
+import pandas as pd
 
 from app.db import get_db
+from app.allocation import run_delta_allocation
+from app.waitlist import backfill_internship
+from app.recommend import index as rec_index
 
 router = APIRouter(prefix="/internships", tags=["internships"])
 
 
 # ---------- Pydantic models (kept local to this router for now) ----------
+# string limits mirror the VARCHAR columns, so overlong values fail validation (a per-row error
+# in bulk imports) instead of the INSERT
 class SkillWeight(BaseModel):
-    skill_code: str
+    skill_code: str = Field(..., max_length=32)
     weight: float = Field(1.0, ge=0.0, le=10.0)
 
 
 class InternshipCreate(BaseModel):
     # Either provide org_id OR org_name (we'll create org if needed)
     org_id: Optional[int] = None
-    org_name: Optional[str] = None
+    org_name: Optional[str] = Field(None, max_length=200)
 
-    title: str
+    title: str = Field(..., max_length=200)
     description: Optional[str] = None
     req_skills_text: Optional[str] = None
 
-    min_cgpa: float = 0.0
+    min_cgpa: float = Field(0.0, ge=0.0, le=10.0)
 
-    location: Optional[str] = None
+    location: Optional[str] = Field(None, max_length=120)
     pincode: Optional[str] = Field(None, min_length=3, max_length=6)
 
-    capacity: int = Field(1, ge=1)
+    capacity: int = Field(1, ge=1, le=2**31 - 1)
 
-    job_role_code: Optional[str] = None
+    job_role_code: Optional[str] = Field(None, max_length=32)
     nsqf_required_level: Optional[int] = Field(None, ge=1, le=10)
 
     min_age: Optional[int] = Field(None, ge=14, le=80)
@@ -42,8 +48,8 @@ class InternshipCreate(BaseModel):
 
     is_shift_night: bool = False
 
-    wage_min: Optional[int] = Field(None, ge=0)
-    wage_max: Optional[int] = Field(None, ge=0)
+    wage_min: Optional[int] = Field(None, ge=0, le=2**31 - 1)
+    wage_max: Optional[int] = Field(None, ge=0, le=2**31 - 1)
 
     category_quota: Optional[Dict[str, int]] = None        # e.g., {"SC":1,"ST":1}
 
@@ -65,7 +71,35 @@ class InternshipCreate(BaseModel):
         return v
 
 
+class CapacityUpdate(BaseModel):
+    capacity: int = Field(..., ge=0)
+
+
 # ---------- Helpers ----------
+FT_MIN_TOKEN = 3        # innodb_ft_min_token_size default
+COUNT_TTL_SECONDS = 30
+
+_count_cache: Dict[tuple, tuple] = {}   # filter key -> (expires_at, total)
+
+
+def _cached_count(key: tuple) -> Optional[int]:
+    hit = _count_cache.get(key)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    return None
+
+
+def _store_count(key: tuple, total: int):
+    if len(_count_cache) > 1024:
+        _count_cache.clear()
+    _count_cache[key] = (time.monotonic() + COUNT_TTL_SECONDS, total)
+
+
+def invalidate_listing_cache():
+    _count_cache.clear()
+    rec_index.mark_dirty()
+
+
 async def _ensure_org(db: AsyncSession, org_id: Optional[int], org_name: Optional[str]) -> int:
     """Return a valid org_id. If org_name provided and not present, create it."""
     if org_id:
@@ -88,53 +122,274 @@ async def _ensure_org(db: AsyncSession, org_id: Optional[int], org_name: Optiona
     return int(new_id)
 
 
+INTERNSHIP_COLS = [
+    "org_id", "org_name", "title", "description", "req_skills_text",
+    "min_cgpa", "location", "pincode", "capacity",
+    "job_role_code", "nsqf_required_level", "min_age",
+    "genders_allowed", "languages_required_json",
+    "is_shift_night", "wage_min", "wage_max",
+    "category_quota_json", "is_active",
+]
+JSON_COLS = {"genders_allowed", "languages_required_json", "category_quota_json"}
+
+BULK_CHUNK = 500        # rows per multi-row INSERT
+BULK_MAX_ROWS = 20000
+
+
+def _internship_params(payload: InternshipCreate, oid: int) -> dict:
+    return {
+        "org_id": oid,
+        "org_name": payload.org_name,
+        "title": payload.title,
+        "description": payload.description,
+        "req_skills_text": payload.req_skills_text,
+        "min_cgpa": float(payload.min_cgpa or 0.0),
+        "location": payload.location,
+        "pincode": payload.pincode,
+        "capacity": int(payload.capacity),
+        "job_role_code": payload.job_role_code,
+        "nsqf_required_level": payload.nsqf_required_level,
+        "min_age": payload.min_age,
+        "genders_allowed": json.dumps(payload.genders_allowed) if payload.genders_allowed else None,
+        "languages_required_json": json.dumps(payload.languages_required) if payload.languages_required else None,
+        "is_shift_night": 1 if payload.is_shift_night else 0,
+        "wage_min": payload.wage_min,
+        "wage_max": payload.wage_max,
+        "category_quota_json": json.dumps(payload.category_quota) if payload.category_quota else None,
+        "is_active": 1 if payload.is_active else 0,
+    }
+
+
+def _values_sql(i: int) -> str:
+    return "(" + ", ".join(
+        f"CAST(:{c}_{i} AS JSON)" if c in JSON_COLS else f":{c}_{i}" for c in INTERNSHIP_COLS
+    ) + ")"
+
+
+async def _insert_internships(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """Multi-row INSERT in chunks of BULK_CHUNK. Returns the new ids in input order; does not commit."""
+    ids: List[int] = []
+    for start in range(0, len(rows), BULK_CHUNK):
+        chunk = rows[start:start + BULK_CHUNK]
+        params = {f"{c}_{i}": r[c] for i, r in enumerate(chunk) for c in INTERNSHIP_COLS}
+        res = await db.execute(text(
+            f"INSERT INTO internship ({', '.join(INTERNSHIP_COLS)}) VALUES "
+            + ", ".join(_values_sql(i) for i in range(len(chunk)))
+        ), params)
+        first = int(res.lastrowid or (await db.execute(text("SELECT LAST_INSERT_ID()"))).scalar())
+        if len(chunk) == 1:
+            ids.append(first)
+            continue
+
+        # a multi-row INSERT reports its first id; InnoDB gives one statement consecutive ids,
+        # check anyway (auto_increment_increment > 1 would break that) rather than mis-attach skills
+        got = (await db.execute(text("""
+            SELECT internship_id, title FROM internship
+            WHERE internship_id BETWEEN :lo AND :hi
+            ORDER BY internship_id
+        """), {"lo": first, "hi": first + len(chunk) - 1})).all()
+        if [t for _, t in got] != [r["title"] for r in chunk]:
+            raise RuntimeError("batch insert did not get consecutive internship ids")
+        ids.extend(int(i) for i, _ in got)
+    return ids
+
+
+async def _resolve_org_names(db: AsyncSession, names: set) -> tuple:
+    """
+    Map org names to ids with one IN lookup, then one INSERT batch for the missing ones
+    (names are length-checked by InternshipCreate, so nothing gets truncated).
+    Names the collation matches differently from Python (accents, padding) fall back to a single lookup.
+    Returns (name -> org_id, number of orgs created); does not commit.
+    """
+    if not names:
+        return {}, 0
+
+    async def lookup(wanted):
+        found = (await db.execute(text("""
+            SELECT org_id, org_name FROM organization WHERE org_name IN :names
+        """).bindparams(bindparam("names", expanding=True)), {"names": tuple(wanted)})).all()
+        by_lower = {str(n).lower(): int(oid) for oid, n in found}
+        return {n: by_lower[n.lower()] for n in wanted if n.lower() in by_lower}
+
+    resolved = await lookup(names)
+    missing = sorted(names - set(resolved))
+    if missing:
+        # ux_org_name: rows another request created meanwhile are left as they are, and picked up below;
+        # unlike INSERT IGNORE, any other error still fails the import
+        await db.execute(text("""
+            INSERT INTO organization (org_name) VALUES (:n)
+            ON DUPLICATE KEY UPDATE org_id = org_id
+        """), [{"n": n} for n in missing])
+        resolved.update(await lookup(set(missing)))
+
+    for n in names - set(resolved):
+        oid = (await db.execute(text("SELECT org_id FROM organization WHERE org_name=:n LIMIT 1"), {"n": n})).scalar()
+        if oid:
+            resolved[n] = int(oid)
+    return resolved, len(missing)
+
+
+def _error_text(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+
+CSV_LISTS = ("genders_allowed", "languages_required")
+
+
+def _split_pairs(value: str) -> List[tuple]:
+    """'A:1;B:2;C' -> [('A', '1'), ('B', '2'), ('C', None)]"""
+    out = []
+    for part in value.split(";"):
+        if not part.strip():
+            continue
+        k, sep, v = part.partition(":")
+        out.append((k.strip(), v.strip() if sep else None))
+    return out
+
+
+def _csv_record(r: dict) -> dict:
+    """
+    One CSV row -> InternshipCreate kwargs. Empty cells are omitted (model defaults apply).
+      genders_allowed / languages_required: 'M;F'
+      category_quota: 'SC:1;ST:1'
+      job_skills: 'PY01:2;SQL01' (weight defaults to 1, also for 'PY01:')
+    """
+    out = {k: v.strip() for k, v in r.items() if isinstance(v, str) and v.strip()}
+    for k in CSV_LISTS:
+        if k in out:
+            out[k] = [x.strip() for x in out[k].split(";") if x.strip()]
+    if "category_quota" in out:
+        pairs = _split_pairs(out["category_quota"])
+        if any(not v for _, v in pairs):
+            raise ValueError("category_quota: expected CODE:count;CODE:count")
+        out["category_quota"] = dict(pairs)
+    if "job_skills" in out:
+        out["job_skills"] = [
+            {"skill_code": c, "weight": w} if w else {"skill_code": c}
+            for c, w in _split_pairs(out["job_skills"])
+        ]
+    return out
+
+
+async def _bulk_import(db: AsyncSession, records: List[tuple], errors: List[dict], auto_allocate: bool) -> dict:
+    """
+    records: (row number, raw dict); errors may already hold rows that failed to parse. Bad rows are reported in `errors` and skipped; the rest are
+    written in one transaction:
+      1. validate every row, check org_ids and skill codes with one query each
+      2. resolve / create organizations by name in one batch
+      3. multi-row INSERT internships, then job_skill_required as one executemany
+    """
+    received = len(records) + len(errors)
+
+    # 1) per-row validation
+    valid = []
+    for n, rec in records:
+        try:
+            valid.append((n, InternshipCreate(**rec)))
+        except (ValidationError, TypeError, ValueError) as e:
+            errors.append({"row": n, "error": _error_text(e)})
+
+    try:
+        org_ids = {p.org_id for _, p in valid if p.org_id}
+        known_ids = set()
+        if org_ids:
+            known_ids = set((await db.execute(text("""
+                SELECT org_id FROM organization WHERE org_id IN :ids
+            """).bindparams(bindparam("ids", expanding=True)), {"ids": tuple(org_ids)})).scalars().all())
+
+        codes = {s.skill_code for _, p in valid for s in (p.job_skills or [])}
+        known_codes = set()
+        if codes:
+            known_codes = set((await db.execute(text("""
+                SELECT skill_code FROM skill_ref WHERE skill_code IN :codes
+            """).bindparams(bindparam("codes", expanding=True)), {"codes": tuple(codes)})).scalars().all())
+
+        checked = []
+        for n, p in valid:
+            if p.org_id and p.org_id not in known_ids:
+                errors.append({"row": n, "error": f"Organization id {p.org_id} not found"})
+                continue
+            row_codes = [s.skill_code for s in (p.job_skills or [])]
+            unknown = sorted(set(row_codes) - known_codes)
+            if unknown:
+                errors.append({"row": n, "error": f"Unknown skill_code(s): {unknown}"})
+                continue
+            if len(row_codes) != len(set(row_codes)):
+                errors.append({"row": n, "error": "Duplicate skill_code in job_skills"})
+                continue
+            checked.append((n, p))
+
+        # 2) organizations, only for rows that will be inserted
+        by_name, orgs_created = await _resolve_org_names(db, {p.org_name for _, p in checked if not p.org_id})
+
+        rows, kept = [], []
+        for n, p in checked:
+            oid = p.org_id or by_name.get(p.org_name)
+            if not oid:
+                errors.append({"row": n, "error": f"Organization {p.org_name!r} could not be resolved"})
+                continue
+            rows.append(_internship_params(p, oid))
+            kept.append((n, p))
+
+        # 3) internships + structured skills
+        ids = await _insert_internships(db, rows) if rows else []
+        skill_rows = [
+            {"internship_id": iid, "skill_code": s.skill_code, "weight": float(s.weight)}
+            for iid, (_, p) in zip(ids, kept) for s in (p.job_skills or [])
+        ]
+        if skill_rows:
+            await db.execute(text("""
+                INSERT INTO job_skill_required (internship_id, skill_code, weight)
+                VALUES (:internship_id, :skill_code, :weight)
+            """), skill_rows)
+
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(500, f"Bulk import failed, nothing was written: {e}")
+
+    if ids:
+        invalidate_listing_cache()
+
+    # 4) one delta allocation over all new active postings
+    run_id = None
+    allocation_error = None
+    active = [iid for iid, (_, p) in zip(ids, kept) if p.is_active]
+    if auto_allocate and active:
+        try:
+            run_id = await run_delta_allocation(db, active)
+        except RuntimeError as e:
+            allocation_error = str(e)
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "status": "success",
+        "received": received,
+        "inserted": len(ids),
+        "failed": len(errors),
+        "orgs_created": orgs_created,
+        "created": [{"row": n, "internship_id": iid} for iid, (n, _) in zip(ids, kept)],
+        "errors": errors,
+        "run_id": run_id,
+        "allocation_error": allocation_error,
+    }
+
+
 # ---------- Routes ----------
 @router.post("", summary="Create a new internship (with optional structured skills)")
-async def create_internship(payload: InternshipCreate, db: AsyncSession = Depends(get_db)):
+async def create_internship(
+    payload: InternshipCreate,
+    auto_allocate: bool = Query(True, description="Fill the new seats from unallocated students"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
         # 1) resolve organization
         oid = await _ensure_org(db, payload.org_id, payload.org_name)
 
         # 2) insert internship
-        params = {
-            "org_id": oid,
-            "org_name": payload.org_name,
-            "title": payload.title,
-            "description": payload.description,
-            "req_skills_text": payload.req_skills_text,
-            "min_cgpa": float(payload.min_cgpa or 0.0),
-            "location": payload.location,
-            "pincode": payload.pincode,
-            "capacity": int(payload.capacity),
-            "job_role_code": payload.job_role_code,
-            "nsqf_required_level": payload.nsqf_required_level,
-            "min_age": payload.min_age,
-            "genders_allowed": json.dumps(payload.genders_allowed) if payload.genders_allowed else None,
-            "languages_required_json": json.dumps(payload.languages_required) if payload.languages_required else None,
-            "is_shift_night": 1 if payload.is_shift_night else 0,
-            "wage_min": payload.wage_min,
-            "wage_max": payload.wage_max,
-            "category_quota_json": json.dumps(payload.category_quota) if payload.category_quota else None,
-            "is_active": 1 if payload.is_active else 0,
-        }
-
-        res = await db.execute(text("""
-            INSERT INTO internship
-              (org_id, org_name, title, description, req_skills_text,
-               min_cgpa, location, pincode, capacity,
-               job_role_code, nsqf_required_level, min_age,
-               genders_allowed, languages_required_json,
-               is_shift_night, wage_min, wage_max,
-               category_quota_json, is_active)
-            VALUES
-              (:org_id, :org_name, :title, :description, :req_skills_text,
-               :min_cgpa, :location, :pincode, :capacity,
-               :job_role_code, :nsqf_required_level, :min_age,
-               CAST(:genders_allowed AS JSON), CAST(:languages_required_json AS JSON),
-               :is_shift_night, :wage_min, :wage_max,
-               CAST(:category_quota_json AS JSON), :is_active)
-        """), params)
-        iid = res.lastrowid or (await db.execute(text("SELECT LAST_INSERT_ID()"))).scalar()
+        iid = (await _insert_internships(db, [_internship_params(payload, oid)]))[0]
 
         # 3) insert structured job skills (if any)
         if payload.job_skills:
@@ -145,24 +400,192 @@ async def create_internship(payload: InternshipCreate, db: AsyncSession = Depend
             """), rows)
 
         await db.commit()
-
-        return {"status": "success", "internship_id": int(iid)}
     except HTTPException:
         raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(500, f"Failed to create internship: {e}")
 
+    invalidate_listing_cache()
+
+    # 4) delta allocation for just this posting (existing placements stay frozen)
+    run_id = None
+    allocation_error = None
+    if auto_allocate and payload.is_active:
+        try:
+            run_id = await run_delta_allocation(db, [int(iid)])
+        except RuntimeError as e:
+            # the posting is committed; a later run or POST /{id}/backfill fills it
+            allocation_error = str(e)
+
+    return {"status": "success", "internship_id": int(iid), "run_id": run_id,
+            "allocation_error": allocation_error}
+
+
+@router.post("/bulk", summary="Bulk-create internships from a JSON array (per-row error report)")
+async def bulk_create_internships(
+    rows: List[Dict[str, Any]] = Body(..., description="InternshipCreate objects"),
+    auto_allocate: bool = Query(True, description="Fill the new seats from unallocated students"),
+    db: AsyncSession = Depends(get_db),
+):
+    if not rows:
+        raise HTTPException(400, "No rows")
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(400, f"At most {BULK_MAX_ROWS} rows per import")
+    return await _bulk_import(db, list(enumerate(rows)), [], auto_allocate)
+
+
+@router.post("/bulk/csv", summary="Bulk-create internships from a CSV (per-row error report)")
+async def bulk_create_internships_csv(
+    file: UploadFile,
+    auto_allocate: bool = Query(True, description="Fill the new seats from unallocated students"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Columns are InternshipCreate fields; `row` in the report is the 0-based data row.
+    List-like cells use ';' (see _csv_record), e.g. job_skills = 'PY01:2;SQL01'.
+    """
+    try:
+        df = pd.read_csv(file.file, dtype=str, keep_default_na=False)
+    except Exception as e:
+        raise HTTPException(400, f"Invalid CSV: {e}")
+    if df.empty:
+        raise HTTPException(400, "CSV has no rows")
+    if len(df) > BULK_MAX_ROWS:
+        raise HTTPException(400, f"At most {BULK_MAX_ROWS} rows per import")
+
+    records, errors = [], []
+    for n, r in enumerate(df.to_dict("records")):
+        try:
+            records.append((n, _csv_record(r)))
+        except ValueError as e:
+            errors.append({"row": n, "error": str(e)})
+    return await _bulk_import(db, records, errors, auto_allocate)
+
+
+@router.patch("/{internship_id}/capacity", summary="Change capacity; new seats are backfilled")
+async def update_capacity(
+    internship_id: int,
+    payload: CapacityUpdate,
+    auto_allocate: bool = Query(True, description="Fill added seats from the waitlist / unallocated students"),
+    db: AsyncSession = Depends(get_db),
+):
+    row = (await db.execute(text("""
+        SELECT capacity, is_active FROM internship WHERE internship_id=:iid
+    """), {"iid": internship_id})).mappings().first()
+    if not row:
+        raise HTTPException(404, f"Internship {internship_id} not found")
+
+    old_cap = int(row["capacity"])
+    await db.execute(text("""
+        UPDATE internship SET capacity=:cap WHERE internship_id=:iid
+    """), {"cap": payload.capacity, "iid": internship_id})
+    await db.commit()
+    rec_index.mark_dirty()
+
+    backfill = None
+    if auto_allocate and row["is_active"] and payload.capacity > old_cap:
+        try:
+            backfill = await backfill_internship(db, internship_id)
+        except RuntimeError as e:
+            raise HTTPException(409, str(e))
+
+    return {"status": "success", "internship_id": internship_id,
+            "old_capacity": old_cap, "capacity": payload.capacity, "backfill": backfill}
 
-@router.get("", summary="List internships (basic)")
-async def list_internships(db: AsyncSession = Depends(get_db)):
-    rows = (await db.execute(text("""
+
+@router.post("/{internship_id}/backfill", summary="Fill free seats from the precomputed waitlist")
+async def backfill(
+    internship_id: int,
+    fallback: bool = Query(True, description="Run a scoped delta allocation if the waitlist runs dry"),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        res = await backfill_internship(db, internship_id, fallback=fallback)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+    if res is None:
+        raise HTTPException(404, f"Internship {internship_id} not found")
+    return res
+
+
+def _fulltext_query(q: str) -> Optional[str]:
+    """Turn free text into a BOOLEAN MODE query: every word required, prefix-matched."""
+    words = [w for w in re.split(r"[^\w]+", q.lower()) if len(w) >= FT_MIN_TOKEN]
+    return " ".join(f"+{w}*" for w in words) or None
+
+
+@router.get("", summary="Search internships (keyset-paginated)")
+async def list_internships(
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(200, ge=1, le=500),
+    location: Optional[str] = None,
+    pincode_prefix: Optional[str] = Query(None, regex=r"^\d{1,6}$"),
+    org_id: Optional[int] = None,
+    org: Optional[str] = Query(None, description="Organization name"),
+    active: Optional[bool] = None,
+    min_cgpa: Optional[float] = Query(None, ge=0, le=10,
+                                      description="Only postings a student with this CGPA qualifies for"),
+    q: Optional[str] = Query(None, description="Keyword search over title / required skills"),
+    db: AsyncSession = Depends(get_db),
+):
+    where, params = [], {}
+    if location:
+        where.append("i.location = :location")
+        params["location"] = location
+    if pincode_prefix:
+        where.append("i.pincode LIKE :pin")
+        params["pin"] = pincode_prefix + "%"
+    if org_id is not None:
+        where.append("i.org_id = :org_id")
+        params["org_id"] = org_id
+    if org:
+        where.append("(i.org_name = :org OR i.org_id IN (SELECT org_id FROM organization WHERE org_name = :org))")
+        params["org"] = org
+    if active is not None:
+        where.append("i.is_active = :active")
+        params["active"] = 1 if active else 0
+    if min_cgpa is not None:
+        where.append("i.min_cgpa <= :min_cgpa")
+        params["min_cgpa"] = min_cgpa
+    if q and q.strip():
+        ft = _fulltext_query(q)
+        if ft:
+            where.append("MATCH(i.title, i.req_skills_text) AGAINST (:ft IN BOOLEAN MODE)")
+            params["ft"] = ft
+        else:
+            # only words shorter than the FULLTEXT min token size (e.g. "ml", "js")
+            where.append("(i.title LIKE :kw OR i.req_skills_text LIKE :kw)")
+            params["kw"] = f"%{q.strip()}%"
+
+    # total ignores the cursor, so it can be cached per filter set
+    key = tuple(sorted(params.items()))
+    total = _cached_count(key)
+    if total is None:
+        total = (await db.execute(text(f"""
+            SELECT COUNT(*) FROM internship i
+            WHERE {" AND ".join(where) or "1=1"}
+        """), params)).scalar()
+        _store_count(key, int(total))
+
+    if cursor is not None:
+        where.append("i.internship_id < :cursor")
+        params["cursor"] = cursor
+
+    rows = (await db.execute(text(f"""
         SELECT i.internship_id, COALESCE(i.org_name, o.org_name) AS org_name,
                i.title, i.location, i.pincode, i.capacity, i.is_active,
                i.min_cgpa
         FROM internship i
         LEFT JOIN organization o ON o.org_id = i.org_id
+        WHERE {" AND ".join(where) or "1=1"}
         ORDER BY i.internship_id DESC
-        LIMIT 200
-    """))).mappings().all()
-    return {"items": rows}
\ No newline at end of file
+        LIMIT :lim
+    """), {**params, "lim": limit + 1})).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = int(rows[-1]["internship_id"])
+
+    return {"items": rows, "next_cursor": next_cursor, "total": int(total)}
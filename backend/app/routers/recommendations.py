@@ -0,0 +1,38 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from pydantic import BaseModel, Field
+from app.db import get_db
+from app.recommend import recommend
+
+router = APIRouter(prefix="/students", tags=["recommendations"])
+
+
+class BatchRecommendRequest(BaseModel):
+    student_ids: List[int] = Field(..., min_items=1, max_items=500)
+    k: int = Field(10, ge=1, le=100)
+
+
+@router.get("/{student_id}/recommendations", summary="Top-K internships for one student (no run is written)")
+async def student_recommendations(
+    student_id: int,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    t0 = time.perf_counter()
+    res = (await recommend(db, [student_id], k))[student_id]
+    if res is None:
+        raise HTTPException(404, f"Student {student_id} not found")
+    return {"student_id": student_id, "k": k, "items": res,
+            "took_ms": round((time.perf_counter() - t0) * 1000.0, 2)}
+
+
+@router.post("/recommendations", summary="Top-K internships for many students")
+async def batch_recommendations(payload: BatchRecommendRequest, db: AsyncSession = Depends(get_db)):
+    t0 = time.perf_counter()
+    res = await recommend(db, payload.student_ids, payload.k)
+    return {"k": payload.k,
+            "results": [{"student_id": sid, "items": items} for sid, items in res.items()],
+            "missing": [sid for sid, items in res.items() if items is None],
+            "took_ms": round((time.perf_counter() - t0) * 1000.0, 2)}
@@ -1,36 +1,219 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio, json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.db import get_db
+from app.db import get_db, AsyncSessionLocal
+from app.progress import hub, Progress, TERMINAL
 from app.allocation import run_allocation
+from app.sharding import run_sharded_allocation
+from app.compaction import compact_history, drop_archive_before
+from app.waitlist import fill_from_waitlist
+from app.locks import lock_name, locked_connection, region_key
+from app.fastjson import RowsResponse
 
 router = APIRouter(prefix="/run", tags=["allocation"])
 
 @router.post("/")
-async def run_now(db: AsyncSession = Depends(get_db)):
-    rid = await run_allocation(db)
+async def run_now(
+    sharded: bool = Query(False, description="Partition by region and solve shards in parallel under GET_LOCK"),
+    prefix_len: int = Query(2, ge=1, le=6, description="Pincode prefix length used as the region key"),
+    candidate_mode: str = Query("exact", regex="^(exact|minhash)$"),
+    lsh_bands: int = Query(32, ge=1, le=128, description="More bands -> higher recall, more pairs"),
+    lsh_rows: int = Query(1, ge=1, le=16, description="More rows per band -> fewer, more similar pairs"),
+    improve_budget_ms: int = Query(50, ge=0, le=10000, description="Local-search budget after greedy (0 = off)"),
+    db: AsyncSession = Depends(get_db),
+):
+    if sharded:
+        rid = await run_sharded_allocation(db, prefix_len=prefix_len)
+    else:
+        try:
+            rid = await run_allocation(db, candidate_mode=candidate_mode,
+                                       lsh_bands=lsh_bands, lsh_rows=lsh_rows,
+                                       improve_budget_ms=improve_budget_ms)
+        except RuntimeError as e:
+            raise HTTPException(409, str(e))
     return {"run_id": rid, "status": "SUCCESS"}
 
+_background = set()  # keep task refs alive until they finish
+
+async def _run_in_background(run_id: int, candidate_mode: str):
+    progress = Progress(run_id)
+    async with AsyncSessionLocal() as db:
+        try:
+            await run_allocation(db, candidate_mode=candidate_mode, run_id=run_id, progress=progress)
+        except Exception as e:
+            await db.rollback()
+            await db.execute(text("""
+                UPDATE alloc_run SET status='FAILED', error_message=:err WHERE run_id=:rid
+            """), {"err": str(e), "rid": run_id})
+            await db.commit()
+            progress.failed(str(e))
+
+@router.post("/start")
+async def start_run(
+    candidate_mode: str = Query("exact", regex="^(exact|minhash)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Start an allocation in the background; follow it on GET /run/{run_id}/events"""
+    active = hub.active()
+    if active is not None:
+        # a run is already in flight here: hand it back instead of piling up another
+        return {"run_id": active, "status": "RUNNING", "reused": True}
+
+    rid = (await db.execute(text("""
+        INSERT INTO alloc_run (status, params_json, metrics_json)
+        VALUES ('RUNNING', NULL, NULL)
+    """))).lastrowid
+    await db.commit()
+    rid = int(rid)
+
+    hub.publish(rid, {"type": "queued", "run_id": rid})
+    task = asyncio.create_task(_run_in_background(rid, candidate_mode))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return {"run_id": rid, "status": "RUNNING", "reused": False}
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+@router.get("/{run_id}/events")
+async def run_events(run_id: int, db: AsyncSession = Depends(get_db)):
+    """Server-Sent Events stream of allocation progress; ends with a done/failed event"""
+    last = hub.last(run_id)
+    if last is None:
+        status = (await db.execute(text("SELECT status FROM alloc_run WHERE run_id=:rid"), {"rid": run_id})).scalar()
+        if status is None:
+            raise HTTPException(404, f"Run {run_id} not found")
+        if status != "RUNNING":
+            # finished (or started by another process): report the final state only
+            last = {"type": "done" if status == "SUCCESS" else "failed", "run_id": run_id, "status": status}
+
+    async def stream():
+        q = hub.subscribe(run_id)
+        try:
+            cur = hub.last(run_id) or last
+            if cur is not None:
+                yield _sse(cur)
+                if cur["type"] in TERMINAL:
+                    return
+            while True:
+                try:
+                    ev = await asyncio.wait_for(q.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if hub.last(run_id) is None:
+                        # run lives in another worker process: fall back to polling its status
+                        async with AsyncSessionLocal() as poll:
+                            status = (await poll.execute(text(
+                                "SELECT status FROM alloc_run WHERE run_id=:rid"), {"rid": run_id})).scalar()
+                        if status != "RUNNING":
+                            yield _sse({"type": "done" if status == "SUCCESS" else "failed",
+                                        "run_id": run_id, "status": status})
+                            return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(ev)
+                if ev["type"] in TERMINAL:
+                    return
+        finally:
+            hub.unsubscribe(run_id, q)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.delete("/placements/{student_id}")
+async def withdraw_placement(
+    student_id: int,
+    backfill: bool = Query(True, description="Refill the freed seat from the internship's waitlist"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Withdraw a placed student and backfill the freed seats.
+    Match rows stay as they are, so run results and exports keep their history. The
+    student_withdrawal marker takes the placement out of every used-seat count and keeps the
+    student out of later runs and backfills. The marker is permanent: re-uploading the student
+    does not clear it (a replace_all upload, which empties the table, does).
+    Runs under the region locks of the freed internships, like backfill and delta runs.
+    """
+    freed = (await db.execute(text("""
+        SELECT DISTINCT mr.internship_id, i.pincode, i.location
+        FROM match_result mr
+        JOIN alloc_run ar ON ar.run_id = mr.run_id
+        JOIN internship i ON i.internship_id = mr.internship_id
+        WHERE mr.student_id=:sid AND ar.status='SUCCESS'
+          AND NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = mr.student_id)
+        ORDER BY mr.internship_id
+    """), {"sid": student_id})).mappings().all()
+    await db.commit()
+    if not freed:
+        raise HTTPException(404, f"Student {student_id} has no placement")
+
+    ids = [int(f["internship_id"]) for f in freed]
+    names = sorted({lock_name(region_key(f["pincode"], f["location"])) for f in freed})
+    results = []
+    try:
+        async with locked_connection(names, 10) as conn:
+            await conn.execute(text("""
+                INSERT INTO student_withdrawal (student_id, internship_id) VALUES (:sid, :iid) AS new
+                ON DUPLICATE KEY UPDATE internship_id = new.internship_id, withdrawn_at = CURRENT_TIMESTAMP
+            """), {"sid": student_id, "iid": ids[0]})
+            # stale waitlist entries are filtered by the marker anyway; drop them to keep lists short
+            await conn.execute(text("DELETE FROM internship_waitlist WHERE student_id=:sid"), {"sid": student_id})
+            await conn.commit()
+
+            if backfill:
+                for iid in ids:
+                    results.append(await fill_from_waitlist(conn, iid))
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+    return {"student_id": student_id, "freed_internships": ids, "backfill": results}
+
+@router.post("/compact")
+async def compact(
+    keep_runs: int = Query(1, ge=1, description="Newest runs with matches to keep as-is"),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        return await compact_history(db, keep_runs=keep_runs)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+
+@router.delete("/archive")
+async def purge_archive(before_run_id: int = Query(..., ge=1)):
+    dropped = await drop_archive_before(before_run_id)
+    return {"dropped_partitions": dropped}
+
 @router.get("/{run_id}/results")
 async def run_results(run_id: int, db: AsyncSession = Depends(get_db)):
     rows = (await db.execute(text("""
         SELECT mr.run_id, s.student_id, s.name AS student_name, s.email,
                i.internship_id, i.title AS internship_title,
                COALESCE(i.org_name, o.org_name) AS organization,
-               i.location, i.pincode, mr.final_score, mr.component_json, mr.created_at
-        FROM match_result mr
+               i.location, i.pincode, mr.final_score,
+               JSON_OBJECT('semantic', mr.sem_score, 'location', mr.loc_score, 'cgpa_norm', mr.cgpa_score,
+                           'weights', ar.params_json->'$.weights') AS component_json,
+               mr.created_at
+        FROM (
+            SELECT run_id, student_id, internship_id, final_score, sem_score, loc_score, cgpa_score, created_at
+            FROM match_result WHERE run_id = :rid
+            UNION ALL
+            SELECT run_id, student_id, internship_id, final_score, sem_score, loc_score, cgpa_score, created_at
+            FROM match_result_archive WHERE run_id = :rid
+        ) mr
+        JOIN alloc_run ar ON ar.run_id = mr.run_id
         JOIN student s ON s.student_id = mr.student_id
         JOIN internship i ON i.internship_id = mr.internship_id
         LEFT JOIN organization o ON o.org_id = i.org_id
-        WHERE mr.run_id = :rid
         ORDER BY mr.final_score DESC
     """), {"rid": run_id})).mappings().all()
-    return {"count": len(rows), "results": [dict(r) for r in rows]}
+    # component_json comes back from MySQL as JSON text; embed it as-is instead of re-encoding
+    return RowsResponse(rows, raw_json=("component_json",), extra={"count": len(rows)})
 
 @router.get("/latest")
 async def latest_run(db: AsyncSession = Depends(get_db)):
     rid = (await db.execute(text("""
-        SELECT run_id FROM alloc_run WHERE status='SUCCESS'
+        SELECT run_id FROM alloc_run
+        WHERE status='SUCCESS' AND COALESCE(params_json->>'$.mode', '') <> 'compaction'
         ORDER BY created_at DESC LIMIT 1
     """))).scalar()
     if not rid:
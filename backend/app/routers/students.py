@@ -63,7 +63,8 @@ async def upload_students(
     # Optional: replace all
     if mode == "replace_all":
         # careful: TRUNCATE requires privileges
-        for tbl in ("match_result", "student_availability", "student_skill", "preference"):
+        for tbl in ("match_result", "internship_waitlist", "student_withdrawal",
+                    "student_availability", "student_skill", "preference"):
             await db.execute(text(f"TRUNCATE TABLE {tbl}"))
         await db.execute(text("TRUNCATE TABLE student"))
         await db.commit()
@@ -136,8 +137,13 @@ async def upload_students(
 
     # Run allocation only for these emails, keeping existing matches frozen
     run_id = None
+    allocation_error = None
     if auto_allocate:
-        run_id = await run_allocation(db, scope_emails=emails, respect_existing=True)
+        try:
+            run_id = await run_allocation(db, scope_emails=emails, respect_existing=True)
+        except RuntimeError as e:
+            # rows are already committed; the next run picks these students up
+            allocation_error = str(e)
 
     return {
         "status": "success",
@@ -147,4 +153,5 @@ async def upload_students(
         "updated": updated,
         "skipped": skipped,
         "run_id": run_id,
+        "allocation_error": allocation_error,
     }
\ No newline at end of file
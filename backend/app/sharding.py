@@ -0,0 +1,260 @@
+# app/sharding.py
+
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from collections import defaultdict
+
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from sqlalchemy import text, bindparam
+
+from app.allocation import score_pair, greedy_assign, insert_matches, WEIGHTS
+from app.locks import GLOBAL_LOCK, lock_name, locked_connection, region_key
+
+# shards solved at once; each holds a pooled connection (default pool: 5 + 10 overflow)
+# while it waits on the process pool, so stay well under the pool size
+SHARD_CONCURRENCY = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor()
+    return _pool
+
+
+# ---------- Pure solver (runs in worker processes) ----------
+def solve_shard(students: List[dict], job_info: Dict[int, dict]):
+    """Score + greedy for one shard. Inputs/outputs are plain picklable structures."""
+    pairs = []
+    for s in students:
+        for jid, j in job_info.items():
+            scored = score_pair(s, j)
+            if scored is None:
+                continue
+            pairs.append((scored[0], int(s["student_id"]), jid, scored[1]))
+    pairs.sort(reverse=True, key=lambda x: x[0])
+
+    remaining = {jid: j["remaining"] for jid, j in job_info.items()}
+    assigned = greedy_assign(pairs, remaining)
+    return assigned, remaining, len(pairs)
+
+
+# ---------- Shard execution ----------
+async def _revalidate(conn: AsyncConnection, students: List[dict], jobs: Dict[int, dict]):
+    """
+    Under lock: drop students placed by another run and recompute remaining seats.
+    RUNNING runs count too, so concurrent sharded runs never double-book.
+    """
+    if students:
+        sids = tuple(int(s["student_id"]) for s in students)
+        placed = set((await conn.execute(text("""
+            SELECT mr.student_id
+            FROM match_result mr
+            JOIN alloc_run ar ON ar.run_id = mr.run_id
+            WHERE ar.status IN ('SUCCESS', 'RUNNING') AND mr.student_id IN :sids
+        """).bindparams(bindparam("sids", expanding=True)), {"sids": sids})).scalars().all())
+        students = [s for s in students if int(s["student_id"]) not in placed]
+
+    job_info = {}
+    if jobs:
+        ids = tuple(jobs)
+        used = dict((await conn.execute(text("""
+            SELECT mr.internship_id, COUNT(*)
+            FROM match_result mr
+            JOIN alloc_run ar ON ar.run_id = mr.run_id
+            WHERE ar.status IN ('SUCCESS', 'RUNNING') AND mr.internship_id IN :ids
+              AND NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = mr.student_id)
+            GROUP BY mr.internship_id
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": ids})).all())
+        for jid, j in jobs.items():
+            rem = j["capacity"] - int(used.get(jid, 0))
+            if rem > 0:
+                job_info[jid] = dict(j, remaining=rem)
+
+    return students, job_info
+
+
+async def _run_locked(run_id: int, lock_names: List[str], students: List[dict],
+                      jobs: Dict[int, dict], lock_timeout: int):
+    """
+    Allocate `students` into `jobs` while holding the given named locks (see locked_connection).
+    Returns (assigned, remaining, stats) or None if a lock could not be taken.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        async with locked_connection(lock_names, lock_timeout) as conn:
+            students, job_info = await _revalidate(conn, students, jobs)
+            if not students or not job_info:
+                return {}, {jid: j["remaining"] for jid, j in job_info.items()}, {"pairs": 0}
+
+            assigned, remaining, npairs = await loop.run_in_executor(
+                _executor(), solve_shard, students, job_info
+            )
+            await insert_matches(conn, run_id, assigned)
+            await conn.commit()
+            return assigned, remaining, {"pairs": npairs}
+    except RuntimeError:
+        return None
+
+
+def partition(students, jobs, prefix_len: int = 2):
+    """
+    Split internships by region_key(prefix_len) and students by the region of the postings in
+    their location_pref (home pincode if there are none).
+    Returns (jobs_by_region, st_by_region, locks_by_region). Lock keys are always the canonical
+    region_key(pincode, location) of each internship, whatever the shard granularity, so shard
+    locks exclude the full, delta and backfill paths that lock the same internships.
+    """
+    jobs_by_region = defaultdict(dict)
+    locks_by_region = defaultdict(set)
+    seats_by_loc = defaultdict(lambda: defaultdict(int))
+    for j in jobs:
+        k = region_key(j["pincode"], j["location"], prefix_len)
+        jobs_by_region[k][int(j["internship_id"])] = {
+            "location": j["location"],
+            "capacity": int(j["capacity"]),
+            "remaining": int(j["capacity"]),
+            "req_skills_text": j["req_skills_text"] or "",
+            "min_cgpa": float(j["min_cgpa"] or 0.0),
+        }
+        locks_by_region[k].add(lock_name(region_key(j["pincode"], j["location"])))
+        if j["location"]:
+            seats_by_loc[j["location"].lower()][k] += int(j["capacity"])
+    # location -> region holding most of its seats (same lowercase match score_pair uses)
+    loc_region = {loc: max(ks.items(), key=lambda kv: (kv[1], kv[0]))[0] for loc, ks in seats_by_loc.items()}
+
+    # students go where their preferred location's postings are, since that is what scoring
+    # rewards; home pincode only when there is no preference or no posting there
+    st_by_region = defaultdict(list)
+    for s in students:
+        pref = (s["location_pref"] or "").lower()
+        k = loc_region.get(pref) or region_key(s["pincode"], s["location_pref"], prefix_len)
+        st_by_region[k].append({
+            "student_id": int(s["student_id"]),
+            "cgpa": float(s["cgpa"]) if s["cgpa"] is not None else None,
+            "location_pref": s["location_pref"],
+            "skills_text": s["skills_text"],
+        })
+
+    return jobs_by_region, st_by_region, locks_by_region
+
+
+# ---------- Sharded Allocation ----------
+async def run_sharded_allocation(db: AsyncSession, prefix_len: int = 2, lock_timeout: int = 10):
+    """
+    Region-sharded allocation:
+      - Active internships are partitioned by region_key(); unplaced students by the region of
+        the postings in their location_pref (home pincode if there are none).
+      - Each shard is solved concurrently under its own GET_LOCK, so independent
+        regions (and concurrent runs) never contend for the same seats.
+      - A global pass then places leftovers into any remaining capacity across regions.
+    Existing placements are frozen. Returns: run_id
+    """
+    rid = (await db.execute(text("""
+        INSERT INTO alloc_run (status, params_json, metrics_json)
+        VALUES ('RUNNING',
+                JSON_OBJECT('mode', 'sharded', 'respect_existing', 1, 'prefix_len', :pl,
+                            'weights', CAST(:w AS JSON)),
+                NULL)
+    """), {"pl": prefix_len, "w": json.dumps(WEIGHTS)})).lastrowid
+    rid = int(rid)
+    await db.commit()
+
+    try:
+        # 1. Snapshot of candidates (revalidated per shard under lock)
+        students = (await db.execute(text("""
+            SELECT s.student_id, s.cgpa, s.location_pref, s.pincode, s.skills_text
+            FROM student s
+            WHERE NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = s.student_id)
+              AND NOT EXISTS (
+                SELECT 1 FROM match_result mr
+                JOIN alloc_run ar ON ar.run_id = mr.run_id
+                WHERE mr.student_id = s.student_id AND ar.status IN ('SUCCESS', 'RUNNING')
+            )
+        """))).mappings().all()
+
+        jobs = (await db.execute(text("""
+            SELECT i.internship_id, i.location, i.pincode, i.capacity,
+                   i.req_skills_text, i.min_cgpa
+            FROM internship i
+            WHERE i.is_active = 1
+        """))).mappings().all()
+
+        # 2. Partition by region (plain dicts so shards can be shipped to worker processes)
+        jobs_by_region, st_by_region, locks_by_region = partition(students, jobs, prefix_len)
+
+        # 3. Solve shards concurrently (bounded, see SHARD_CONCURRENCY)
+        keys = sorted(set(st_by_region) & set(jobs_by_region))
+        sem = asyncio.Semaphore(SHARD_CONCURRENCY)
+
+        async def solve(k):
+            async with sem:
+                return await _run_locked(rid, sorted(locks_by_region[k]), st_by_region[k], jobs_by_region[k], lock_timeout)
+
+        results = await asyncio.gather(*[solve(k) for k in keys])
+
+        assigned_all = {}
+        locked_out = []
+        shard_pairs = 0
+        remaining_by_job = {}
+        for k, res in zip(keys, results):
+            if res is None:
+                locked_out.append(k)
+                continue
+            assigned, remaining, stats = res
+            assigned_all.update(assigned)
+            remaining_by_job.update(remaining)
+            shard_pairs += stats["pairs"]
+
+        # 4. Global pass for cross-region leftovers (shards that were locked out are left alone)
+        skip = set(locked_out)
+        left_students, left_jobs, left_locks = [], {}, set()
+        for k, lst in st_by_region.items():
+            if k in skip:
+                continue
+            for s in lst:
+                if s["student_id"] not in assigned_all:
+                    left_students.append(s)
+        for k, js in jobs_by_region.items():
+            if k in skip:
+                continue
+            for jid, j in js.items():
+                if remaining_by_job.get(jid, j["remaining"]) > 0:
+                    left_jobs[jid] = j
+                    left_locks |= locks_by_region[k]
+
+        global_assigned = 0
+        if left_students and left_jobs:
+            names = [GLOBAL_LOCK] + sorted(left_locks)
+            res = await _run_locked(rid, names, left_students, left_jobs, lock_timeout)
+            if res is None:
+                locked_out.append("global")
+            else:
+                assigned_all.update(res[0])
+                global_assigned = len(res[0])
+
+        metrics = {
+            "shards": len(keys),
+            "shard_pairs": shard_pairs,
+            "locked_out": locked_out,
+            "assigned": len(assigned_all),
+            "global_assigned": global_assigned,
+        }
+        await db.execute(text("""
+            UPDATE alloc_run SET status='SUCCESS', metrics_json=CAST(:m AS JSON)
+            WHERE run_id=:rid
+        """), {"m": json.dumps(metrics), "rid": rid})
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        await db.execute(text("""
+            UPDATE alloc_run SET status='FAILED', error_message=:err WHERE run_id=:rid
+        """), {"err": str(e), "rid": rid})
+        await db.commit()
+        raise
+
+    return rid
@@ -0,0 +1,103 @@
+# app/waitlist.py
+
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from sqlalchemy import text
+
+from app.allocation import WEIGHTS, allocate_delta, insert_matches, record_run
+from app.locks import lock_name, locked_connection, region_key
+
+
+async def backfill_internship(db: AsyncSession, internship_id: int, fallback: bool = True,
+                              lock_timeout: int = 10) -> Optional[dict]:
+    """
+    Fill free seats of one internship under its region lock, the same one sharded allocation
+    uses (see fill_from_waitlist).
+    Returns None if the internship does not exist. Raises RuntimeError if the lock times out.
+    """
+    job = (await db.execute(text("""
+        SELECT i.location, i.pincode FROM internship i WHERE i.internship_id=:iid
+    """), {"iid": internship_id})).mappings().first()
+    await db.commit()
+    if not job:
+        return None
+
+    name = lock_name(region_key(job["pincode"], job["location"]))
+    async with locked_connection([name], lock_timeout) as conn:
+        return await fill_from_waitlist(conn, internship_id, fallback)
+
+
+async def fill_from_waitlist(conn: AsyncConnection, internship_id: int, fallback: bool = True) -> dict:
+    """
+    Fill free seats of one internship from its most recent persisted waitlist.
+    The caller holds the internship's region lock on `conn`.
+      - Candidates placed elsewhere since the waitlist was written are skipped (lazy re-validation).
+      - Withdrawn placements do not count as used seats.
+      - If the waitlist runs dry and fallback=True, a delta run scoped to this internship fills the rest,
+        still under the same lock.
+    """
+    job = (await conn.execute(text("""
+        SELECT i.capacity, i.is_active FROM internship i WHERE i.internship_id=:iid
+    """), {"iid": internship_id})).mappings().first()
+    if not job or not job["is_active"]:
+        return {"internship_id": internship_id, "free_seats": 0, "filled": 0,
+                "run_id": None, "fallback_run_id": None}
+
+    used = (await conn.execute(text("""
+        SELECT COUNT(*)
+        FROM match_result mr
+        JOIN alloc_run ar ON ar.run_id = mr.run_id
+        WHERE mr.internship_id=:iid AND ar.status IN ('SUCCESS', 'RUNNING')
+          AND NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = mr.student_id)
+    """), {"iid": internship_id})).scalar()
+    free = int(job["capacity"]) - int(used or 0)
+
+    picks = []
+    if free > 0:
+        picks = (await conn.execute(text("""
+            SELECT w.run_id, w.student_id, w.score, w.sem_score, w.loc_score, w.cgpa_score
+            FROM internship_waitlist w
+            WHERE w.internship_id = :iid
+              AND w.run_id = (SELECT MAX(run_id) FROM internship_waitlist WHERE internship_id = :iid)
+              AND NOT EXISTS (SELECT 1 FROM student_withdrawal sw WHERE sw.student_id = w.student_id)
+              AND NOT EXISTS (
+                  SELECT 1 FROM match_result mr
+                  JOIN alloc_run ar ON ar.run_id = mr.run_id
+                  WHERE mr.student_id = w.student_id AND ar.status IN ('SUCCESS', 'RUNNING')
+              )
+            ORDER BY w.ranked
+            LIMIT :free
+        """), {"iid": internship_id, "free": free})).mappings().all()
+
+    rid = None
+    if picks:
+        assigned = {
+            int(p["student_id"]): (
+                internship_id,
+                float(p["score"]),
+                (float(p["sem_score"] or 0), float(p["loc_score"] or 0), float(p["cgpa_score"] or 0)),
+            )
+            for p in picks
+        }
+        rid = await record_run(conn, {
+            "mode": "backfill",
+            "respect_existing": 1,
+            "internship_id": internship_id,
+            "waitlist_run_id": int(picks[0]["run_id"]),
+            "weights": WEIGHTS,
+        }, {"free_seats": free, "assigned": len(assigned)})
+        await insert_matches(conn, rid, assigned)
+        await conn.commit()
+
+    # waitlist exhausted: scoped run over current unallocated students, before the lock is let go
+    fallback_rid = None
+    if fallback and free > len(picks):
+        fallback_rid = await allocate_delta(conn, [internship_id])
+
+    return {
+        "internship_id": internship_id,
+        "free_seats": max(free, 0),
+        "filled": len(picks),
+        "run_id": rid,
+        "fallback_run_id": fallback_rid,
+    }
@@ -0,0 +1,102 @@
+# scripts/bench_recommend.py
+"""
+Latency of InternshipIndex.top_k on a synthetic index (no DB needed).
+
+Token popularity follows a Zipf-like distribution, so a few skills sit on a large share of the
+postings, as in real data. Compares the pruned top_k with scoring every posting that shares a token
+(the unpruned union) and reports p50/p99 per query:
+
+    python scripts/bench_recommend.py --postings 100000 -k 10
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.allocation import score_pair, tokens  # noqa: E402
+from app.recommend import InternshipIndex  # noqa: E402
+
+CITIES = ["Pune", "Surat", "Jaipur", "Delhi", "Chennai", "Kolkata", "Mumbai", "Bengaluru", None]
+
+
+def skills(rng, vocab, weights, hi):
+    return " ".join(set(rng.choices(vocab, weights, k=rng.randint(1, hi))))
+
+
+def postings(idx):
+    return sum(len(ids) for groups in idx.by_token.values() for ids in groups.values())
+
+
+def build(rng, target, vocab, weights):
+    idx = InternshipIndex()
+    jid = total = 0
+    while total < target:
+        jid += 1
+        req = skills(rng, vocab, weights, 6)
+        idx._upsert({
+            "internship_id": jid, "title": "", "org_name": "", "pincode": None, "capacity": 1,
+            "location": rng.choice(CITIES),
+            "req_skills_text": req,
+            "min_cgpa": rng.choice([0.0, 0.0, 6.5, 7.5, 8.5]),
+            "is_active": True,
+        })
+        total += len(tokens(req))
+    return idx
+
+
+def unpruned(idx, s, k):
+    s_toks = tokens(s["skills_text"])
+    cand = set()
+    for t in s_toks:
+        for ids in idx.by_token.get(t, {}).values():
+            cand |= ids
+    scored = []
+    for jid in cand:
+        res = score_pair(s, idx.jobs[jid], s_toks, idx.jobs[jid]["tokens"])
+        if res is not None:
+            scored.append(res[0])
+    return heapq.nlargest(k, scored)
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--postings", type=int, default=100_000, help="token postings in the index")
+    ap.add_argument("--vocab", type=int, default=2000, help="distinct skill tokens")
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("-k", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = [f"sk{i}" for i in range(args.vocab)]
+    weights = [1 / (i + 1) for i in range(args.vocab)]
+    idx = build(rng, args.postings, vocab, weights)
+    students = [{
+        "skills_text": skills(rng, vocab, weights, 8),
+        "location_pref": rng.choice(CITIES),
+        "cgpa": None if rng.random() < 0.1 else round(rng.uniform(5.5, 9.9), 2),
+    } for _ in range(args.queries)]
+    print(f"{len(idx.jobs)} internships, {postings(idx)} postings, "
+          f"largest list {max(sum(map(len, g.values())) for g in idx.by_token.values())}")
+
+    for name, fn in (("unpruned", lambda s: unpruned(idx, s, args.k)), ("top_k", lambda s: idx.top_k(s, args.k))):
+        lat = []
+        for s in students:
+            t0 = time.perf_counter()
+            fn(s)
+            lat.append((time.perf_counter() - t0) * 1000)
+        print(f"{name:>9}: p50 {pct(lat, 50):7.2f} ms   p99 {pct(lat, 99):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
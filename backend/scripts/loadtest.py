@@ -0,0 +1,230 @@
+# scripts/loadtest.py
+"""
+Async HTTP load test for app.main:app.
+
+Drives a weighted mix of
+  POST /upload/students, POST /run/, GET /run/{id}/results, GET /download/{id}.csv, GET /internships
+and reports throughput plus p50/p95/p99 latency per endpoint.
+
+Target either a running server (e.g. uvicorn against a local MySQL container):
+
+    docker run -d --name pm-mysql -e MYSQL_ROOT_PASSWORD=pass -p 3306:3306 mysql:8
+    mysql -h127.0.0.1 -uroot -ppass < ../CreateTable.sql
+    DB_PASS=pass uvicorn app.main:app --workers 4
+    python scripts/loadtest.py --base-url http://127.0.0.1:8000 -c 32 -d 60
+
+or the app in-process (no server; DB settings still come from .env / DB_*):
+
+    python scripts/loadtest.py --in-process -c 16 -d 30
+
+The SQL is MySQL-specific (JSON_OBJECT, GET_LOCK, ON DUPLICATE KEY ...), so there is no
+SQLite mode; point DB_* at a throwaway MySQL instead.
+Use --json to save the report and compare it across releases.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+DEFAULT_MIX = "upload=1,run=1,results=8,download=4,internships=8"
+
+SKILLS = ["python", "sql", "ml", "excel", "wiring", "plumbing", "typing", "react", "js", "statistics"]
+CITIES = [("Ahmedabad", "380001"), ("Surat", "395003"), ("Jaipur", "302001"),
+          ("Bengaluru", "560001"), ("Delhi", "110001"), ("Pune", "411001")]
+
+
+def parse_mix(spec: str):
+    mix = {}
+    for part in spec.split(","):
+        name, _, w = part.partition("=")
+        mix[name.strip()] = float(w or 1)
+    unknown = set(mix) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"unknown endpoints in --mix: {sorted(unknown)}")
+    return mix
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    # nearest-rank
+    k = max(1, math.ceil(p / 100.0 * len(sorted_vals)))
+    return sorted_vals[k - 1]
+
+
+def students_csv(rows: int, rng: random.Random) -> bytes:
+    out = io.StringIO()
+    out.write("name,email,category_code,disability_code,cgpa,location_pref,pincode,skills_text\n")
+    tag = uuid.uuid4().hex[:10]
+    for n in range(rows):
+        city, pin = rng.choice(CITIES)
+        skills = " ".join(rng.sample(SKILLS, 3))
+        out.write(f"Load Test {n},loadtest+{tag}.{n}@example.com,GEN,NONE,"
+                  f"{rng.uniform(6.0, 9.8):.2f},{city},{pin},\"{skills}\"\n")
+    return out.getvalue().encode()
+
+
+# ---------- Endpoint drivers ----------
+async def hit_upload(client, state, rng):
+    files = {"file": ("students.csv", students_csv(state["upload_rows"], rng), "text/csv")}
+    r = await client.post("/upload/students",
+                          params={"auto_allocate": str(state["auto_allocate"]).lower(), "mode": "upsert"},
+                          files=files)
+    if r.status_code == 200 and r.json().get("run_id"):
+        state["run_id"] = r.json()["run_id"]
+    return r
+
+
+async def hit_run(client, state, rng):
+    r = await client.post("/run/")
+    if r.status_code == 200:
+        state["run_id"] = r.json()["run_id"]
+    return r
+
+
+async def hit_results(client, state, rng):
+    return await client.get(f"/run/{state['run_id']}/results")
+
+
+async def hit_download(client, state, rng):
+    return await client.get(f"/download/{state['run_id']}.csv")
+
+
+async def hit_internships(client, state, rng):
+    return await client.get("/internships")
+
+
+ENDPOINTS = {
+    "upload": hit_upload,
+    "run": hit_run,
+    "results": hit_results,
+    "download": hit_download,
+    "internships": hit_internships,
+}
+
+
+# ---------- Runner ----------
+async def worker(client, state, mix, deadline, samples, errors, seed):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    while time.perf_counter() < deadline and not state["stop"]:
+        name = rng.choices(names, weights)[0]
+        t0 = time.perf_counter()
+        try:
+            r = await ENDPOINTS[name](client, state, rng)
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples[name].append((time.perf_counter() - t0) * 1000.0)
+        if not ok:
+            errors[name] += 1
+        state["done"] += 1
+        if state["max_requests"] and state["done"] >= state["max_requests"]:
+            state["stop"] = True
+
+
+async def main(args):
+    if args.in_process:
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+    else:
+        transport = None
+        base_url = args.base_url
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits,
+                                 timeout=args.timeout) as client:
+        # need a run id for results/download traffic
+        r = await client.get("/run/latest")
+        if r.status_code == 200:
+            run_id = r.json()["run_id"]
+        else:
+            run_id = (await client.post("/run/")).json()["run_id"]
+
+        state = {
+            "run_id": run_id,
+            "upload_rows": args.upload_rows,
+            "auto_allocate": args.auto_allocate,
+            "max_requests": args.requests,
+            "done": 0,
+            "stop": False,
+        }
+        mix = parse_mix(args.mix)
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(client, state, mix, deadline, samples, errors, args.seed + i)
+            for i in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "base_url": "in-process" if args.in_process else base_url,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "total_requests": sum(len(v) for v in samples.values()),
+        "throughput_rps": round(sum(len(v) for v in samples.values()) / elapsed, 2) if elapsed else None,
+        "endpoints": {},
+    }
+    for name in mix:
+        lat = sorted(samples.get(name, []))
+        report["endpoints"][name] = {
+            "requests": len(lat),
+            "errors": errors.get(name, 0),
+            "rps": round(len(lat) / elapsed, 2) if elapsed else None,
+            "p50_ms": round(percentile(lat, 50), 2) if lat else None,
+            "p95_ms": round(percentile(lat, 95), 2) if lat else None,
+            "p99_ms": round(percentile(lat, 99), 2) if lat else None,
+            "max_ms": round(lat[-1], 2) if lat else None,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"target={report['base_url']} concurrency={report['concurrency']} "
+          f"elapsed={report['elapsed_s']}s requests={report['total_requests']} "
+          f"throughput={report['throughput_rps']} req/s")
+    print(f"{'endpoint':<12} {'reqs':>7} {'errs':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    fmt = lambda v, w: f"{v:{w}.2f}" if v is not None else "-".rjust(w)
+    for name, e in report["endpoints"].items():
+        print(f"{name:<12} {e['requests']:>7} {e['errors']:>5} {fmt(e['rps'], 8)} "
+              f"{fmt(e['p50_ms'], 9)} {fmt(e['p95_ms'], 9)} {fmt(e['p99_ms'], 9)} {fmt(e['max_ms'], 9)}")
+    print("(latencies in ms)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--in-process", action="store_true", help="drive app.main:app through ASGI, no server")
+    ap.add_argument("-c", "--concurrency", type=int, default=16)
+    ap.add_argument("-d", "--duration", type=float, default=30.0, help="seconds")
+    ap.add_argument("-n", "--requests", type=int, default=0, help="stop after N requests (0 = duration only)")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default: {DEFAULT_MIX})")
+    ap.add_argument("--upload-rows", type=int, default=50, help="students per synthetic CSV upload")
+    ap.add_argument("--auto-allocate", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="also write the report to this file")
+    args = ap.parse_args()
+
+    report = asyncio.run(main(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
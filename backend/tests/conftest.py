@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from app.allocation import score_pair
+
+SKILLS = [f"sk{i}" for i in range(25)]
+CITIES = ["Pune", "Surat", "Jaipur", None]
+
+
+def _make_cohort(seed, n_students=120, n_jobs=30):
+    """Random students / job_info entries shaped like the allocator's inputs."""
+    rng = random.Random(seed)
+    students = [{
+        "student_id": i,
+        "cgpa": None if rng.random() < 0.1 else round(rng.uniform(5.5, 9.8), 2),
+        "location_pref": rng.choice(CITIES),
+        "skills_text": " ".join(rng.sample(SKILLS, rng.randint(0, 5))),
+    } for i in range(1, n_students + 1)]
+    jobs = {100 + j: {
+        "location": rng.choice(CITIES),
+        "remaining": rng.randint(1, 4),
+        "req_skills_text": " ".join(rng.sample(SKILLS, rng.randint(1, 5))),
+        "min_cgpa": rng.choice([0.0, 0.0, 7.0, 8.5]),
+    } for j in range(n_jobs)}
+    return students, jobs
+
+
+def _scored_pairs(students, jobs):
+    """Exhaustive pairs, sorted desc, in the allocator's (score, sid, jid, comp) shape."""
+    pairs = []
+    for s in students:
+        for jid, j in jobs.items():
+            res = score_pair(s, j)
+            if res is not None:
+                pairs.append((res[0], s["student_id"], jid, res[1]))
+    pairs.sort(reverse=True, key=lambda x: x[0])
+    return pairs
+
+
+@pytest.fixture
+def make_cohort():
+    return _make_cohort
+
+
+@pytest.fixture
+def scored_pairs():
+    return _scored_pairs
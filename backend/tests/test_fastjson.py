@@ -0,0 +1,35 @@
+import json
+from decimal import Decimal
+
+from app.fastjson import RowsResponse, encode_rows
+
+
+def test_encode_rows_splices_raw_json():
+    rows = [
+        {"id": 1, "score": Decimal("0.8123"), "component_json": '{"semantic": 0.5, "weights": {"sem": 0.65}}'},
+        {"id": 2, "score": Decimal("0.1"), "component_json": None},
+        {"id": 3, "score": Decimal("0"), "component_json": b'{"a": [1, 2]}'},
+        {"id": 4, "score": Decimal("1"), "component_json": {"decoded": True}},
+    ]
+    out = json.loads(encode_rows(rows, raw_json=("component_json",)))
+    assert out == [
+        {"id": 1, "score": 0.8123, "component_json": {"semantic": 0.5, "weights": {"sem": 0.65}}},
+        {"id": 2, "score": 0.1, "component_json": None},
+        {"id": 3, "score": 0.0, "component_json": {"a": [1, 2]}},
+        {"id": 4, "score": 1.0, "component_json": {"decoded": True}},
+    ]
+
+
+def test_encode_rows_raw_only_row():
+    out = json.loads(encode_rows([{"j": "[1,2]"}], raw_json=("j",)))
+    assert out == [{"j": [1, 2]}]
+
+
+def test_encode_rows_empty():
+    assert json.loads(encode_rows([])) == []
+
+
+def test_rows_response_body():
+    resp = RowsResponse([{"id": 1, "c": '{"x": 1}'}], raw_json=("c",), extra={"count": 1})
+    assert json.loads(resp.body) == {"count": 1, "results": [{"id": 1, "c": {"x": 1}}]}
+    assert json.loads(RowsResponse([], key="items").body) == {"items": []}
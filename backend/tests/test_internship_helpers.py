@@ -0,0 +1,41 @@
+import pytest
+
+from app.routers.internships import InternshipCreate, _csv_record, _fulltext_query, _split_pairs
+
+
+def test_fulltext_query_requires_every_word_as_prefix():
+    assert _fulltext_query("Data Analyst") == "+data* +analyst*"
+    assert _fulltext_query("c++/python, SQL") == "+python* +sql*"
+
+
+def test_fulltext_query_drops_short_words():
+    # words under the InnoDB minimum token size never match, so they must not be required
+    assert _fulltext_query("ml in go") is None
+    assert _fulltext_query("an ml engineer") == "+engineer*"
+    assert _fulltext_query("") is None
+
+
+def test_split_pairs():
+    assert _split_pairs("A:1; B : 2;;C") == [("A", "1"), ("B", "2"), ("C", None)]
+    assert _split_pairs("PY01:") == [("PY01", "")]
+
+
+def test_csv_record_parses_list_cells():
+    rec = _csv_record({
+        "title": " Analyst ", "location": "", "genders_allowed": "M; F;",
+        "category_quota": "SC:1;ST:2", "job_skills": "PY01:2;SQL01;JS01:", "capacity": None,
+    })
+    assert rec == {
+        "title": "Analyst",
+        "genders_allowed": ["M", "F"],
+        "category_quota": {"SC": "1", "ST": "2"},
+        "job_skills": [{"skill_code": "PY01", "weight": "2"}, {"skill_code": "SQL01"}, {"skill_code": "JS01"}],
+    }
+    model = InternshipCreate(org_id=1, capacity=1, **rec)
+    assert [s.weight for s in model.job_skills] == [2.0, 1.0, 1.0]
+
+
+@pytest.mark.parametrize("quota", ["SC", "SC:1;ST", "SC:"])
+def test_csv_record_rejects_malformed_category_quota(quota):
+    with pytest.raises(ValueError, match="category_quota"):
+        _csv_record({"title": "Analyst", "category_quota": quota})
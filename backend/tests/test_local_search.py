@@ -0,0 +1,62 @@
+from app.allocation import greedy_assign, improve_assignment, solve_allocation
+
+
+def check_consistent(pairs, assigned, remaining, capacity):
+    sc = {(sid, jid): score for score, sid, jid, _ in pairs}
+    used = {}
+    for sid, (jid, score, _) in assigned.items():
+        assert sc[(sid, jid)] == score  # only scored pairs, with their own score
+        used[jid] = used.get(jid, 0) + 1
+    for jid, cap in capacity.items():
+        assert used.get(jid, 0) <= cap
+        assert remaining[jid] == cap - used.get(jid, 0)
+
+
+def test_greedy_respects_capacity(make_cohort, scored_pairs):
+    students, jobs = make_cohort(1)
+    pairs = scored_pairs(students, jobs)
+    capacity = {jid: j["remaining"] for jid, j in jobs.items()}
+    remaining = dict(capacity)
+    assigned = greedy_assign(pairs, remaining)
+    check_consistent(pairs, assigned, remaining, capacity)
+
+
+def test_improve_assignment_invariants(make_cohort, scored_pairs):
+    for seed in range(20):
+        students, jobs = make_cohort(seed)
+        pairs = scored_pairs(students, jobs)
+        capacity = {jid: j["remaining"] for jid, j in jobs.items()}
+        remaining = dict(capacity)
+        assigned = greedy_assign(pairs, remaining)
+        placed = set(assigned)
+        before = sum(a[1] for a in assigned.values())
+
+        metrics = improve_assignment(pairs, assigned, remaining, budget_ms=10_000)
+
+        after = sum(a[1] for a in assigned.values())
+        assert placed <= set(assigned)  # nobody is unplaced; freed seats may take in new students
+        check_consistent(pairs, assigned, remaining, capacity)
+        assert after >= before - 1e-9
+        assert abs((after - before) - metrics["ls_gain"]) < 1e-3
+
+
+def test_improve_assignment_finds_swap():
+    # greedy gives student 1 the shared seat; swapping is worth 0.9 + 0.8 vs 1.0 + 0.1
+    pairs = [
+        (1.0, 1, 10, ()), (0.9, 2, 10, ()), (0.8, 1, 11, ()), (0.1, 2, 11, ()),
+    ]
+    remaining = {10: 1, 11: 1}
+    assigned = greedy_assign(pairs, remaining)
+    assert {s: a[0] for s, a in assigned.items()} == {1: 10, 2: 11}
+    improve_assignment(pairs, assigned, remaining, budget_ms=1000)
+    assert {s: a[0] for s, a in assigned.items()} == {1: 11, 2: 10}
+
+
+def test_solve_allocation_matches_greedy_without_local_search(make_cohort, scored_pairs):
+    students, jobs = make_cohort(4)
+    assigned, metrics, _, npairs = solve_allocation(students, jobs, list(jobs))
+    pairs = scored_pairs(students, jobs)
+    expected = greedy_assign(pairs, {jid: j["remaining"] for jid, j in jobs.items()})
+    assert npairs == len(pairs)
+    assert {s: a[0] for s, a in assigned.items()} == {s: a[0] for s, a in expected.items()}
+    assert metrics["assigned"] == len(expected)
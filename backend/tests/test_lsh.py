@@ -0,0 +1,40 @@
+from app.allocation import lsh_candidates, lsh_recall, lsh_threshold, solve_allocation, widen_candidates
+
+
+def test_lsh_recall_counts_every_overlapping_pair(make_cohort):
+    students, jobs = make_cohort(5, n_students=80, n_jobs=40)
+    cand = lsh_candidates(students, jobs, bands=16, rows=4)
+    res = lsh_recall(students, jobs, cand, lsh_threshold(16, 4), sample=80)
+    assert res["threshold_pairs"] <= res["overlap_pairs"]
+    # everything as a candidate -> full recall on both figures
+    everything = {s["student_id"]: set(jobs) for s in students}
+    full = lsh_recall(students, jobs, everything, lsh_threshold(16, 4), sample=80)
+    assert full["recall"] == 1.0
+    assert full["overlap_pairs"] == res["overlap_pairs"]
+
+
+def test_candidates_only_share_tokens(make_cohort):
+    students, jobs = make_cohort(6, n_students=60, n_jobs=30)
+    cand = lsh_candidates(students, jobs, bands=32, rows=1)
+    by_id = {s["student_id"]: s for s in students}
+    for sid, jids in cand.items():
+        s_toks = set(by_id[sid]["skills_text"].split())
+        for jid in jids:
+            # one-row bands only collide on a shared minimum, i.e. a shared token
+            assert s_toks & set(jobs[jid]["req_skills_text"].split())
+
+
+def test_minhash_places_students_without_skill_overlap(make_cohort):
+    students, jobs = make_cohort(8, n_students=60, n_jobs=20)
+    students[0]["skills_text"] = ""
+    students[0]["location_pref"] = None
+    cand, exhaustive = widen_candidates(students, jobs, lsh_candidates(students, jobs, bands=32, rows=1))
+    assert cand[students[0]["student_id"]] == set(jobs)
+    assert exhaustive >= 1
+    for s in students:
+        pref = (s["location_pref"] or "").lower()
+        same_loc = {jid for jid, j in jobs.items() if j["location"] and j["location"].lower() == pref}
+        assert same_loc <= cand[s["student_id"]]
+
+    _, metrics, _, _ = solve_allocation(students, jobs, list(jobs), candidate_mode="minhash")
+    assert metrics["lsh"]["exhaustive_students"] == exhaustive
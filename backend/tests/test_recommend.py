@@ -0,0 +1,85 @@
+import heapq
+import random
+
+from app.allocation import score_pair
+from app.recommend import InternshipIndex
+
+SKILLS = [f"sk{i}" for i in range(15)]
+CITIES = ["Pune", "Surat", "Jaipur", "Delhi", None]
+
+
+def build_index(rng, n_jobs=150):
+    idx = InternshipIndex()
+    for jid in range(1, n_jobs + 1):
+        idx._upsert({
+            "internship_id": jid,
+            "title": f"job {jid}",
+            "org_name": "Org",
+            "location": rng.choice(CITIES),
+            "pincode": None,
+            "capacity": 1,
+            "req_skills_text": " ".join(rng.sample(SKILLS, rng.randint(0, 4))),
+            "min_cgpa": rng.choice([0.0, 0.0, 6.5, 7.5, 9.0]),
+            "is_active": rng.random() > 0.1,
+        })
+    return idx
+
+
+def brute_force(idx, s, k):
+    scored = []
+    for jid, j in idx.jobs.items():
+        res = score_pair(s, j)
+        if res is not None:
+            scored.append(res[0])
+    return heapq.nlargest(k, scored)
+
+
+def test_top_k_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(5):
+        idx = build_index(rng)
+        for _ in range(60):
+            s = {
+                "skills_text": " ".join(rng.sample(SKILLS, rng.randint(0, 4))),
+                "location_pref": rng.choice(CITIES),
+                "cgpa": None if rng.random() < 0.2 else round(rng.uniform(5.0, 9.9), 2),
+            }
+            for k in (1, 5, 20):
+                got = idx.top_k(s, k)
+                # ties may pick different postings, the scores must agree
+                assert [r["score"] for r in got] == [round(x, 4) for x in brute_force(idx, s, k)]
+                for r in got:
+                    assert round(score_pair(s, idx.jobs[r["internship_id"]])[0], 4) == r["score"]
+
+
+def test_upsert_and_deactivate_update_every_bucket():
+    rng = random.Random(3)
+    idx = build_index(rng, n_jobs=40)
+    for jid in list(idx.jobs):
+        idx._upsert({**idx.jobs[jid], "org_name": "Org", "is_active": False})
+    assert not idx.jobs
+    assert not idx.by_token and not idx.loc_plain and not idx.loc_cg and not idx.cg_jobs
+
+
+def test_top_k_pruning_is_exact_on_skewed_tokens():
+    # zipf-like token popularity: a few tokens sit on most postings, so pruning actually kicks in
+    rng = random.Random(5)
+    vocab = [f"t{i}" for i in range(200)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    idx = InternshipIndex()
+    for jid in range(1, 2001):
+        idx._upsert({
+            "internship_id": jid, "title": "", "org_name": "", "pincode": None, "capacity": 1,
+            "location": rng.choice(CITIES),
+            "req_skills_text": " ".join(set(rng.choices(vocab, weights, k=rng.randint(1, 6)))),
+            "min_cgpa": rng.choice([0.0, 7.0, 8.5]),
+            "is_active": True,
+        })
+    for _ in range(60):
+        s = {
+            "skills_text": " ".join(set(rng.choices(vocab, weights, k=rng.randint(1, 6)))),
+            "location_pref": rng.choice(CITIES),
+            "cgpa": round(rng.uniform(6.0, 9.9), 2),
+        }
+        for k in (1, 10):
+            assert [r["score"] for r in idx.top_k(s, k)] == [round(x, 4) for x in brute_force(idx, s, k)]
@@ -0,0 +1,44 @@
+from app.locks import lock_name, region_key
+from app.sharding import partition
+
+
+def job(iid, pincode, location, capacity=1):
+    return {"internship_id": iid, "pincode": pincode, "location": location, "capacity": capacity,
+            "req_skills_text": "", "min_cgpa": None}
+
+
+def student(sid, pincode, location_pref):
+    return {"student_id": sid, "pincode": pincode, "location_pref": location_pref,
+            "cgpa": None, "skills_text": ""}
+
+
+def test_region_key_prefers_pincode_then_location():
+    assert region_key("411001", "Pune") == "pin:41"
+    assert region_key("411001", "Pune", prefix_len=3) == "pin:411"
+    assert region_key(" 41", None) == "pin:41"
+    assert region_key("4", " Pune ") == "loc:pune"
+    assert region_key("AB1234", "Pune") == "loc:pune"
+    assert region_key(None, None) == "_"
+
+
+def test_students_follow_the_seats_of_their_preferred_location():
+    jobs = [job(1, "411001", "Pune", 3), job(2, "110001", "Pune", 1), job(3, "560001", "Bengaluru")]
+    students = [
+        student(10, "110020", "pune"),     # preference beats home pincode
+        student(11, "560034", None),       # no preference -> home pincode
+        student(12, "700001", "Kolkata"),  # no posting there -> home pincode
+    ]
+    jobs_by_region, st_by_region, _ = partition(students, jobs)
+    assert set(jobs_by_region["pin:41"]) == {1}
+    assert [s["student_id"] for s in st_by_region["pin:41"]] == [10]
+    assert [s["student_id"] for s in st_by_region["pin:56"]] == [11]
+    assert [s["student_id"] for s in st_by_region["pin:70"]] == [12]
+
+
+def test_lock_names_do_not_depend_on_shard_granularity():
+    jobs = [job(1, "411001", "Pune"), job(2, "412001", "Pune"), job(3, None, "Surat")]
+    for prefix_len in (1, 2, 3):
+        _, _, locks = partition([], jobs, prefix_len)
+        assert set().union(*locks.values()) == {lock_name("pin:41"), lock_name("loc:surat")}
+    _, _, locks = partition([], jobs, prefix_len=1)
+    assert locks["pin:4"] == {lock_name("pin:41")}
@@ -0,0 +1,18 @@
+from app.allocation import build_waitlists, greedy_assign
+
+
+def test_waitlists_skip_assigned_and_keep_order(make_cohort, scored_pairs):
+    students, jobs = make_cohort(3)
+    pairs = scored_pairs(students, jobs)
+    remaining = {jid: j["remaining"] for jid, j in jobs.items()}
+    assigned = greedy_assign(pairs, remaining)
+    lists = build_waitlists(pairs, assigned, size=5)
+    for jid, wl in lists.items():
+        assert len(wl) <= 5
+        assert not any(sid in assigned for sid, _, _ in wl)
+        scores = [score for _, score, _ in wl]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_waitlists_disabled():
+    assert not build_waitlists([(1.0, 1, 10, ())], {}, size=0)